@@ -1,116 +1,338 @@
 import os
+import re
+import tempfile
+import time
 import numpy as np
-from flask import Flask, render_template, request, jsonify, url_for
+from flask import Flask, Response, request, jsonify, url_for
+from werkzeug.middleware.proxy_fix import ProxyFix
 from werkzeug.utils import secure_filename
 from utils.model_loader import load_models
-from utils.predictions import (
-    predict_soil_nutrients,
-    predict_irrigation,
-    get_irrigation_recommendations,
-    get_fertilizer_recommendations
+from utils.predictions import get_irrigation_recommendations, get_fertilizer_recommendations
+from utils.analysis import run_analysis, analyze_batch
+from utils.assets import init_assets
+from utils.compact import compact_results, REFERENCE_BODY, REFERENCE_ETAG
+from utils.compression import init_compression
+from utils.fragments import render_index
+from utils.irrigation_planner import (
+    plan_irrigation,
+    summarize_plan,
+    temperatures_to_matrix,
+    MAX_PLAN_DAYS,
+    MAX_SEASON_DAYS
 )
-from utils.disease_data import get_disease_prediction, get_disease_info
+from utils.jobs import JobQueue, JOB_KINDS
+from utils.profiling import init_profiling
+from utils.rate_limit import init_rate_limiting
+from utils.parallel import BatchPool
+from utils.result_store import ResultStore, request_digest, content_hash
+from utils.sensor_store import SensorStore, readings_to_columns, is_valid_field_id
+from utils.upload_store import UploadStore
+from utils.validation import (
+    ValidationError,
+    SAMPLE_SCHEMA,
+    GEO_SAMPLE_SCHEMA,
+    parse_sample,
+    parse_columns,
+    parse_number,
+    check_range
+)
+from utils.health import warm_up, readiness_checks, check_writable, writable_directory
+from utils.geo_grid import (
+    field_status_raster,
+    encode_raster_binary,
+    encode_raster_json,
+    GRID_CELL_SIZE,
+    IDW_POWER,
+    IDW_RADIUS_CELLS,
+    RASTER_MIMETYPE
+)
+from utils.serialization import json_response, dumps as json_dumps
 
 # Create Flask app
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key'
-app.config['UPLOAD_FOLDER'] = os.path.join('static', 'uploads')
+# Images are served from static/uploads; UPLOAD_FOLDER only moves them for throwaway runs such as load tests
+app.config['UPLOAD_FOLDER'] = os.environ.get('UPLOAD_FOLDER', os.path.join('static', 'uploads'))
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max upload
+# Run each prediction path once at start-up, before the worker serves requests
+app.config['WARMUP'] = os.environ.get('WARMUP', '1').lower() not in ('0', 'false', 'no')
+# HTML/JSON responses smaller than this (bytes) are sent uncompressed
+app.config['COMPRESSION_MIN_SIZE'] = 1024
+# SQLite stores and profiles; serverless deployments can't write to the instance folder,
+# so fall back to the temp directory there rather than failing on import
+app.config['STATE_DIR'] = os.environ.get('STATE_DIR') or writable_directory(
+    app.instance_path, os.path.join(tempfile.gettempdir(), 'soil-health'))
+# SQLite file of stored analysis results; set RESULT_STORE_PATH to an empty string to disable
+app.config['RESULT_STORE_PATH'] = os.environ.get(
+    'RESULT_STORE_PATH', os.path.join(app.config['STATE_DIR'], 'results.sqlite3'))
+app.config['RESULT_STORE_MAX_ENTRIES'] = 10000
+# Index of static/uploads; compaction deletes uploads unused for UPLOAD_TTL_SECONDS
+# and least recently used ones beyond UPLOAD_MAX_BYTES
+app.config['UPLOAD_INDEX_PATH'] = os.environ.get('UPLOAD_INDEX_PATH', os.path.join(app.config['STATE_DIR'], 'uploads.sqlite3'))
+app.config['UPLOAD_TTL_SECONDS'] = int(os.environ.get('UPLOAD_TTL_SECONDS', 30 * 24 * 60 * 60))
+app.config['UPLOAD_MAX_BYTES'] = int(os.environ.get('UPLOAD_MAX_BYTES', 1024 * 1024 * 1024))
+app.config['UPLOAD_COMPACTION_INTERVAL'] = 60 * 60
+# Background analysis jobs; they run in a thread of the web process unless JOB_WORKERS
+# is set, since every importer (including the serverless entry point) starts the queue
+app.config['JOB_QUEUE_PATH'] = os.environ.get('JOB_QUEUE_PATH', os.path.join(app.config['STATE_DIR'], 'jobs.sqlite3'))
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 0))
+app.config['JOB_MAX_UPLOADS'] = 100
+# Longest a /jobs/<id>/events stream stays open; EventSource clients then reconnect
+app.config['JOB_EVENTS_MAX_SECONDS'] = 5 * 60
+# Processes used for large /api/v1/analyze_batch requests, each with its own copy of
+# the models; off (0) by default, and smaller batches always run in-process
+app.config['BATCH_WORKERS'] = int(os.environ.get('BATCH_WORKERS', 0))
+app.config['BATCH_PARALLEL_MIN_ROWS'] = 2000
+app.config['BATCH_MAX_ROWS'] = 200000
+# Opt-in request profiling: PROFILING_SAMPLE_RATE profiles that fraction of requests,
+# PROFILING_SECRET allows profiling single requests with a signed X-Profile header
+app.config['PROFILING_MODE'] = os.environ.get('PROFILING_MODE', 'sampling')
+app.config['PROFILING_SAMPLE_RATE'] = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+app.config['PROFILING_SECRET'] = os.environ.get('PROFILING_SECRET')
+app.config['PROFILING_DIR'] = os.environ.get('PROFILING_DIR', os.path.join(app.config['STATE_DIR'], 'profiles'))
+# Admission control: per-client token bucket (off unless RATE_LIMIT_PER_SECOND is set;
+# RATE_LIMIT_PATH shares buckets between workers) and a cap on concurrent inference
+# requests per process, which wait up to INFERENCE_QUEUE_TIMEOUT seconds for a slot
+app.config['RATE_LIMIT_PER_SECOND'] = float(os.environ.get('RATE_LIMIT_PER_SECOND', 0))
+app.config['RATE_LIMIT_BURST'] = float(os.environ.get('RATE_LIMIT_BURST', 20))
+app.config['RATE_LIMIT_PATH'] = os.environ.get('RATE_LIMIT_PATH')
+# Comma-separated X-API-Key values limited per key rather than per address
+app.config['RATE_LIMIT_API_KEYS'] = [key.strip() for key in os.environ.get('RATE_LIMIT_API_KEYS', '').split(',') if key.strip()]
+# Reverse proxies (e.g. 1 on Vercel) whose X-Forwarded-For/-Proto entries are trusted; with
+# the default 0 a client can't pick its rate-limit bucket by sending those headers itself
+app.config['TRUSTED_PROXY_HOPS'] = int(os.environ.get('TRUSTED_PROXY_HOPS', 0))
+app.config['INFERENCE_CONCURRENCY'] = int(os.environ.get('INFERENCE_CONCURRENCY', 4))
+app.config['INFERENCE_QUEUE_TIMEOUT'] = float(os.environ.get('INFERENCE_QUEUE_TIMEOUT', 2.0))
+# Georeferenced samples accepted by /api/v1/field_grid
+app.config['GRID_MAX_POINTS'] = 200000
+# Directory for append-only sensor readings; in-memory only when unset
+app.config['SENSOR_STORE_DIR'] = os.environ.get('SENSOR_STORE_DIR')
+
+# Take the client address from the trusted proxies' forwarding headers
+if app.config['TRUSTED_PROXY_HOPS'] > 0:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXY_HOPS'],
+                            x_proto=app.config['TRUSTED_PROXY_HOPS'])
 
 # Create upload folder if it doesn't exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
+# Serve static assets under content-hashed names and compress dynamic responses
+init_assets(app)
+init_compression(app, app.config['COMPRESSION_MIN_SIZE'])
+
+# Routes that run the models, and those that count against a client's rate limit
+INFERENCE_ENDPOINTS = {
+    'analyze', 'analyze_demo', 'api_analyze', 'api_analyze_batch', 'api_field_grid',
+    'irrigation_plan', 'field_summary'
+}
+RATE_LIMITED_ENDPOINTS = INFERENCE_ENDPOINTS | {'submit_job', 'ingest_readings'}
+
+# Shed excess load before any request body is read
+init_rate_limiting(app, RATE_LIMITED_ENDPOINTS, INFERENCE_ENDPOINTS)
+
+# Registers request hooks only when profiling is configured
+init_profiling(app)
+
 # Allowed image extensions
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
 
+# Content digest identifying a stored upload (the stem of its file name)
+UPLOAD_DIGEST = re.compile(r'^[0-9a-f]{64}$')
+
 
 def allowed_file(filename):
     return '.' in filename and \
         filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-# Load models at startup
-nutrient_model, irrigation_model = load_models()
+# Process pools are started with spawn, which re-imports this file as __mp_main__
+# in every pool process when the app is run as `python app.py`. Those processes load
+# their own models (utils.parallel), so they skip the app's start-up work below.
+if __name__ != '__mp_main__':
+    # Load models at startup
+    nutrient_model, irrigation_model = load_models()
+
+    # Process pool for large synchronous batches, when BATCH_WORKERS > 1
+    batch_pool = BatchPool(app.config['BATCH_WORKERS'])
+
+    # Warm up (including the batch pool) before any request arrives; /readyz reports the timings
+    if app.config['WARMUP']:
+        try:
+            warmup_report = warm_up(nutrient_model, irrigation_model, batch_pool)
+            print(f"Warm-up finished in {warmup_report['seconds']:.2f}s")
+        except Exception as e:
+            # Keep serving, but /readyz holds traffic back until it's fixed
+            print(f"Warm-up failed: {e}")
+            warmup_report = None
+    else:
+        warmup_report = {'skipped': True}
+
+    # Uploaded images, sharded by content hash and expired in the background
+    upload_store = UploadStore(app.config['UPLOAD_FOLDER'], app.config['UPLOAD_INDEX_PATH'],
+                               app.config['UPLOAD_TTL_SECONDS'], app.config['UPLOAD_MAX_BYTES'])
+    upload_store.start_compaction(app.config['UPLOAD_COMPACTION_INTERVAL'])
+
+    # Previously computed analyses, keyed by their inputs
+    result_store = ResultStore(app.config['RESULT_STORE_PATH'] or None, app.config['RESULT_STORE_MAX_ENTRIES'])
+
+    # Long-running analyses, executed outside the request
+    job_queue = JobQueue(app.config['JOB_QUEUE_PATH'], app.config['JOB_WORKERS'],
+                         models=(nutrient_model, irrigation_model))
+    # Start dispatching now so jobs queued before a restart don't wait for the next submit
+    job_queue.start()
+
+    # Field probe readings and their rolling aggregates
+    sensor_store = SensorStore(app.config['SENSOR_STORE_DIR'])
+
+
+@app.errorhandler(ValidationError)
+def invalid_input(error):
+    """Small 400 response for malformed input, raised before any file or model work"""
+    if request.accept_mimetypes.best == 'text/html' and request.headers.get('X-Requested-With') != 'XMLHttpRequest':
+        return render_index(error=str(error)), 400
+    return json_response({'error': str(error), 'field': error.field}, 400)
+
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness: the process is up and serving requests"""
+    return json_response({'status': 'ok'})
+
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    """Readiness: models and scalers loaded, warm-up done, uploads writable"""
+    ready, checks = readiness_checks(nutrient_model, irrigation_model, app.config['UPLOAD_FOLDER'],
+                                     warmup_report, warmup_required=app.config['WARMUP'])
+    response = json_response({'status': 'ready' if ready else 'not ready', 'checks': checks}, 200 if ready else 503)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
 
 
 @app.route('/')
 def index():
-    return render_template('index.html')
+    return render_index()
+
+
+def read_uploaded_image():
+    """
+    Read the request's 'image' upload, if any, without saving it
+
+    Returns:
+        tuple or None: (secure filename, file contents)
+    """
+    if 'image' not in request.files:
+        print("No 'image' field in the request files")
+        return None
+
+    file = request.files['image']
+    print(f"File received: {file.filename}, Empty: {file.filename == ''}")
+
+    if not (file and file.filename != '' and allowed_file(file.filename)):
+        print("No valid file provided or file type not allowed")
+        return None
+
+    return secure_filename(file.filename), file.read()
+
+
+def save_uploaded_image(upload):
+    """
+    Save an upload returned by read_uploaded_image
+
+    Returns:
+        str or None: Static URL of the saved image
+    """
+    if upload is None:
+        return None
+    secure_name, data = upload
+
+    # Stored under its content hash, so identical uploads share one file
+    filename = upload_store.save(data, secure_name)
+    print(f"File saved successfully to: {os.path.join(app.config['UPLOAD_FOLDER'], filename)}")
+
+    # Generate URL for the template
+    uploaded_image_path = url_for('static', filename=f'uploads/{filename}')
+    print(f"Image path for template: {uploaded_image_path}")
+    return uploaded_image_path
+
+
+def resolve_uploads(digests):
+    """
+    Static URLs of previously stored uploads, given their content digests
+
+    Raises:
+        ValidationError: If `digests` isn't a list of digests of stored uploads
+    """
+    if not isinstance(digests, list) or not digests:
+        raise ValidationError("uploads must be a non-empty list of upload digests", 'uploads')
+    if len(digests) > app.config['JOB_MAX_UPLOADS']:
+        raise ValidationError(f"At most {app.config['JOB_MAX_UPLOADS']} uploads per job", 'uploads')
+
+    image_paths = []
+    for i, digest in enumerate(digests):
+        path = upload_store.path_for(digest) if isinstance(digest, str) and UPLOAD_DIGEST.match(digest) else None
+        if path is None:
+            raise ValidationError(f"uploads[{i}] is not a known upload", 'uploads')
+        image_paths.append(url_for('static', filename=f'uploads/{path}'))
+    return image_paths
+
+
+def touch_uploads(image_paths):
+    """Mark the uploads behind these static URLs as used, so compaction keeps them"""
+    prefix = url_for('static', filename='uploads/')
+    for image_path in image_paths:
+        if image_path and image_path.startswith(prefix):
+            upload_store.touch(image_path[len(prefix):])
+
+
+def analyze_once(ph_value, temperature, upload):
+    """
+    Analyze a sample, reusing the stored result when the same inputs were seen before
+
+    Returns:
+        tuple: (results, hit)
+    """
+    image_hash = content_hash(upload[1]) if upload is not None else None
+    key = request_digest(ph_value, temperature, image_hash)
+
+    def compute():
+        uploaded_image_path = save_uploaded_image(upload)
+        return run_analysis(nutrient_model, irrigation_model, ph_value, temperature, uploaded_image_path)
+
+    results, hit = result_store.get_or_compute(key, compute)
+    if hit and upload is not None:
+        # Compaction may have removed the image since the result was stored; saving
+        # the same bytes again refreshes it, or writes it back, at its content path
+        results = dict(results, image_path=save_uploaded_image(upload))
+    return results, hit
 
 
 @app.route('/analyze', methods=['POST'])
 def analyze():
-    try:
-        # Get form data
-        ph_value = float(request.form.get('ph', 7.0))
-        temperature = float(request.form.get('temperature', 25.0))
+    # Malformed input is answered by invalid_input before anything is read or saved
+    sample = parse_sample(request.form)
+    ph_value, temperature = sample['ph'], sample['temperature']
 
+    try:
         # Debug output
         print(f"Form data received - pH: {ph_value}, Temperature: {temperature}")
         print(f"Files in request: {list(request.files.keys())}")
 
-        # Process file upload if provided
-        uploaded_image_path = None
-        if 'image' in request.files:
-            file = request.files['image']
-            print(f"File received: {file.filename}, Empty: {file.filename == ''}")
-
-            if file and file.filename != '' and allowed_file(file.filename):
-                # Generate a unique filename to avoid overwrites
-                import time
-                unique_prefix = int(time.time())
-                secure_name = secure_filename(file.filename)
-                filename = f"{unique_prefix}_{secure_name}"
-
-                # Make sure upload folder exists
-                os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-
-                # Save the file
-                filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                file.save(filepath)
-                print(f"File saved successfully to: {filepath}")
-
-                # Generate URL for the template
-                uploaded_image_path = url_for('static', filename=f'uploads/{filename}')
-                print(f"Image path for template: {uploaded_image_path}")
-            else:
-                print("No valid file provided or file type not allowed")
-        else:
-            print("No 'image' field in the request files")
+        # Read file upload if provided; it is only saved if the analysis isn't already stored
+        upload = read_uploaded_image()
 
-        # Make predictions
+        # Make predictions and recommendations
         print("Making predictions...")
-        soil_nutrients = predict_soil_nutrients(nutrient_model, ph_value)
-        irrigation_data = predict_irrigation(irrigation_model, temperature)
-
-        # Get recommendations
-        print("Generating recommendations...")
-        fertilizer_recommendations = get_fertilizer_recommendations(soil_nutrients)
-        irrigation_recommendations = get_irrigation_recommendations(irrigation_data, temperature)
-
-        # For disease, use hardcoded predictions since model is unavailable
-        disease_results = get_disease_prediction(uploaded_image_path)
-        disease_info = get_disease_info(disease_results['disease'])
-
-        # Prepare response data
-        results = {
-            'soil_nutrients': soil_nutrients,
-            'irrigation_data': irrigation_data,
-            'fertilizer_recommendations': fertilizer_recommendations,
-            'irrigation_recommendations': irrigation_recommendations,
-            'disease_results': disease_results,
-            'disease_info': disease_info,
-            'image_path': uploaded_image_path
-        }
-
-        print(f"Results prepared. Image path: {uploaded_image_path}")
+        results, hit = analyze_once(ph_value, temperature, upload)
+
+        print(f"Results prepared ({'stored' if hit else 'computed'}). Image path: {results['image_path']}")
 
         # Return JSON response for AJAX requests
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return jsonify(results)
 
         # Return rendered template for direct form submissions
-        return render_template('index.html', results=results)
+        return render_index(results=results)
 
     except Exception as e:
         # Log the full error with traceback
@@ -119,7 +341,7 @@ def analyze():
         print(traceback.format_exc())
 
         # Return error page or message
-        return render_template('index.html', error=f"An error occurred: {str(e)}")
+        return render_index(error=f"An error occurred: {str(e)}")
 
 
 @app.route('/analyze_demo', methods=['GET'])
@@ -138,44 +360,21 @@ def analyze_demo():
         sample_image_file = os.path.join('static', 'img', 'rice_sample.jpg')
         if not os.path.exists(sample_image_file):
             print("Sample image not found, looking for alternatives")
-            # Look for any image in uploads folder
-            uploads_dir = os.path.join('static', 'uploads')
-            if os.path.exists(uploads_dir):
-                image_files = [f for f in os.listdir(uploads_dir)
-                               if f.lower().endswith(('.jpg', '.jpeg', '.png'))]
-                if image_files:
-                    # Use the most recent uploaded image
-                    sample_image_path = url_for('static', filename=f'uploads/{image_files[0]}')
-                    print(f"Using existing upload as sample: {sample_image_path}")
-
-        # Make predictions
-        soil_nutrients = predict_soil_nutrients(nutrient_model, ph_value)
-        irrigation_data = predict_irrigation(irrigation_model, temperature)
-
-        # Get recommendations
-        fertilizer_recommendations = get_fertilizer_recommendations(soil_nutrients)
-        irrigation_recommendations = get_irrigation_recommendations(irrigation_data, temperature)
-
-        # For disease, use hardcoded predictions
-        disease_results = get_disease_prediction(None, is_demo=True)
-        disease_info = get_disease_info(disease_results['disease'])
-
-        # Prepare response data
-        results = {
-            'soil_nutrients': soil_nutrients,
-            'irrigation_data': irrigation_data,
-            'fertilizer_recommendations': fertilizer_recommendations,
-            'irrigation_recommendations': irrigation_recommendations,
-            'disease_results': disease_results,
-            'disease_info': disease_info,
-            'image_path': sample_image_path,
-            'is_demo': True
-        }
+            # Use the most recent uploaded image, found through the upload index
+            latest_image = upload_store.latest_image()
+            if latest_image:
+                upload_store.touch(latest_image)
+                sample_image_path = url_for('static', filename=f'uploads/{latest_image}')
+                print(f"Using existing upload as sample: {sample_image_path}")
+
+        # Make predictions and recommendations; disease is hardcoded for the demo
+        results = run_analysis(nutrient_model, irrigation_model, ph_value, temperature,
+                               sample_image_path, is_demo=True)
 
         print(f"Demo results prepared. Using image: {sample_image_path}")
 
         # Return rendered template for the demo
-        return render_template('index.html', results=results)
+        return render_index(results=results)
 
     except Exception as e:
         # Log error
@@ -184,23 +383,257 @@ def analyze_demo():
         print(traceback.format_exc())
 
         # Return error page
-        return render_template('index.html', error=f"An error occurred in demo: {str(e)}")
+        return render_index(error=f"An error occurred in demo: {str(e)}")
+
+
+@app.route('/api/v1/reference', methods=['GET'])
+def api_reference():
+    """Static reference data that compact /api/v1 responses index into"""
+    if request.if_none_match.contains(REFERENCE_ETAG):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(REFERENCE_BODY, mimetype='application/json')
+    response.set_etag(REFERENCE_ETAG)
+    response.headers['Cache-Control'] = 'public, max-age=86400'
+    return response
+
+
+@app.route('/api/v1/analyze', methods=['POST'])
+def api_analyze():
+    """Compact JSON analysis: numbers and indexes into /api/v1/reference"""
+    payload = request.get_json(silent=True) if request.is_json else request.form
+    if payload is None:
+        return json_response({'error': 'Expected a JSON or form body'}, 400)
+
+    sample = parse_sample(payload)
+    ph_value, temperature = sample['ph'], sample['temperature']
+
+    upload = read_uploaded_image() if not request.is_json else None
+    results, _ = analyze_once(ph_value, temperature, upload)
+    return json_response(compact_results(results))
+
+
+@app.route('/api/v1/analyze_batch', methods=['POST'])
+def api_analyze_batch():
+    """Compact analysis of many pH/temperature samples in one request"""
+    columns = parse_columns(request.get_json(silent=True), max_rows=app.config['BATCH_MAX_ROWS'])
+    ph_values, temperatures = columns['ph'], columns['temperature']
+    rows = len(ph_values)
+
+    if rows < app.config['BATCH_PARALLEL_MIN_ROWS'] or batch_pool.workers <= 1:
+        results = [compact_results(analysis) for analysis in
+                   analyze_batch(nutrient_model, irrigation_model, ph_values, temperatures)]
+    else:
+        results = batch_pool.analyze(ph_values, temperatures)
+
+    return json_response({'count': rows, 'results': results})
+
+
+@app.route('/api/v1/field_grid', methods=['POST'])
+def api_field_grid():
+    """Interpolated nutrient/temperature status rasters from GPS-tagged samples"""
+    payload = request.get_json(silent=True)
+    columns = parse_columns(payload, GEO_SAMPLE_SCHEMA, max_rows=app.config['GRID_MAX_POINTS'])
+    cell_size = parse_number('cell_size', payload.get('cell_size', GRID_CELL_SIZE), 0.5, 10000)
+    power = parse_number('power', payload.get('power', IDW_POWER), 0.5, 5)
+    radius_cells = int(parse_number('radius_cells', payload.get('radius_cells', IDW_RADIUS_CELLS), 1, 10))
+
+    try:
+        metadata, raster = field_status_raster(
+            nutrient_model, columns['lat'], columns['lon'], columns['ph'], columns['temperature'],
+            cell_size=cell_size, power=power, radius_cells=radius_cells)
+    except ValueError as e:
+        return json_response({'error': str(e)}, 400)
+
+    # Raw uint8 cells by default; base64 inside JSON for clients that can't handle binary
+    if payload.get('format') == 'json':
+        return json_response(encode_raster_json(metadata, raster))
+    return app.response_class(encode_raster_binary(metadata, raster), mimetype=RASTER_MIMETYPE)
+
+
+@app.route('/fields/<field_id>/readings', methods=['POST'])
+def ingest_readings(field_id):
+    """Bulk ingestion of pH/temperature probe readings for a field"""
+    if not is_valid_field_id(field_id):
+        return jsonify({'error': 'Invalid field ID'}), 400
+
+    payload = request.get_json(silent=True)
+    if payload is None:
+        return jsonify({'error': 'Expected a JSON body'}), 400
+
+    try:
+        columns = readings_to_columns(payload)
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': f"Invalid readings: {str(e)}"}), 400
+    for metric, (_, values) in columns.items():
+        minimum, maximum, _ = SAMPLE_SCHEMA[metric]
+        check_range(metric, values, minimum, maximum)
+
+    counts = sensor_store.ingest(field_id, columns)
+    return jsonify({'field_id': field_id, **counts})
+
+
+@app.route('/fields/<field_id>/summary', methods=['GET'])
+def field_summary(field_id):
+    """Rolling aggregates and model predictions for a field"""
+    if not is_valid_field_id(field_id):
+        return jsonify({'error': 'Invalid field ID'}), 400
+
+    aggregates = sensor_store.aggregates(field_id)
+    if aggregates is None:
+        return jsonify({'error': 'Unknown field'}), 404
+
+    predictions = sensor_store.predictions(field_id, nutrient_model, irrigation_model)
+
+    recommendations = {}
+    if predictions['soil_nutrients'] is not None:
+        recommendations['fertilizer'] = get_fertilizer_recommendations(predictions['soil_nutrients'])
+    if predictions['irrigation_data'] is not None:
+        recommendations['irrigation'] = get_irrigation_recommendations(
+            predictions['irrigation_data'], predictions['inputs']['temperature'])
+
+    return jsonify({
+        'field_id': field_id,
+        'aggregates': aggregates,
+        'predictions': predictions,
+        'recommendations': recommendations
+    })
+
+
+@app.route('/plan/irrigation', methods=['POST'])
+def irrigation_plan():
+    """Season-long irrigation budgets and daily schedules from temperature forecasts"""
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not isinstance(payload.get('seasons'), list):
+        return jsonify({'error': 'Expected a JSON object with a list of seasons'}), 400
+
+    # Each season is either a bare list of daily temperatures or {"id": ..., "temperatures": [...]}
+    season_ids = []
+    forecasts = []
+    for i, season in enumerate(payload['seasons']):
+        if isinstance(season, dict):
+            season_ids.append(season.get('id', i))
+            forecasts.append(season.get('temperatures'))
+        else:
+            season_ids.append(i)
+            forecasts.append(season)
+
+    if not forecasts or not all(isinstance(forecast, list) and forecast for forecast in forecasts):
+        return jsonify({'error': 'Every season needs a non-empty list of daily temperatures'}), 400
+
+    longest = max(len(forecast) for forecast in forecasts)
+    if longest > MAX_SEASON_DAYS:
+        return jsonify({'error': f"A season can have at most {MAX_SEASON_DAYS} days"}), 413
+    # Seasons are padded to the longest one, so that is what bounds the matrix
+    if len(forecasts) * longest > MAX_PLAN_DAYS:
+        return jsonify({'error': f"Too many days in one plan (max {MAX_PLAN_DAYS})"}), 413
+
+    try:
+        temperatures = temperatures_to_matrix(forecasts)
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': f"Invalid temperatures: {str(e)}"}), 400
+    minimum, maximum, _ = SAMPLE_SCHEMA['temperature']
+    check_range('temperatures', temperatures, minimum, maximum, allow_nan=True)
+
+    plan = plan_irrigation(irrigation_model, temperatures)
+    return jsonify(summarize_plan(plan, season_ids, include_schedule=payload.get('include_schedule', True)))
+
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """Queue a single, batch or image-set analysis and return its job ID"""
+    if request.is_json:
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict):
+            return jsonify({'error': 'Expected a JSON object'}), 400
+        kind = payload.pop('kind', 'batch')
+        if kind not in JOB_KINDS:
+            return jsonify({'error': f"kind must be one of: {', '.join(JOB_KINDS)}"}), 400
+        # Store normalized inputs so the worker never sees malformed ones
+        if kind == 'single':
+            payload = parse_sample(payload, required=True)
+        elif kind == 'batch':
+            columns = parse_columns(payload, max_rows=app.config['BATCH_MAX_ROWS'])
+            payload = {name: values.tolist() for name, values in columns.items()}
+        else:
+            # Images are referenced by the digests of earlier uploads (the file name of an
+            # image_path returned by the analysis routes), never by client-supplied paths
+            payload = dict(parse_sample(payload), image_paths=resolve_uploads(payload.get('uploads')))
+    else:
+        # Image sets are uploaded as multipart form data with several 'images' files;
+        # the form fields are checked before any image is saved
+        kind = 'images'
+        payload = parse_sample(request.form)
+        payload['image_paths'] = [
+            save_uploaded_image((secure_filename(file.filename), file.read()))
+            for file in request.files.getlist('images')
+            if file and file.filename != '' and allowed_file(file.filename)
+        ]
+
+    try:
+        job_id = job_queue.submit(kind, payload)
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f"Invalid job payload: {str(e)}"}), 400
+
+    response = jsonify(job_queue.status(job_id))
+    response.status_code = 202
+    response.headers['Location'] = url_for('job_status', job_id=job_id)
+    return response
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    status = job_queue.status(job_id)
+    if status is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(status)
+
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    """Compact results of a finished job (see /api/v1/reference)"""
+    status = job_queue.status(job_id)
+    if status is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    if status['status'] != 'done':
+        return jsonify(status), 409
+    results = job_queue.result(job_id)
+    touch_uploads(result['image_path'] for result in results)
+    return json_response({'id': job_id, 'results': results})
+
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """Server-sent events with the job's progress until it finishes"""
+    if job_queue.status(job_id) is None:
+        return jsonify({'error': 'Unknown job'}), 404
+
+    # Don't hold a worker for the whole life of a long or stuck job
+    deadline = time.monotonic() + app.config['JOB_EVENTS_MAX_SECONDS']
+
+    def stream():
+        last = None
+        while True:
+            status = job_queue.status(job_id)
+            if status != last:
+                yield f"data: {json_dumps(status).decode('utf-8')}\n\n"
+                last = status
+            if status['status'] in ('done', 'failed') or time.monotonic() >= deadline:
+                return
+            time.sleep(0.5)
+
+    return Response(stream(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
 
 
 if __name__ == '__main__':
     print("Starting Soil Health Monitoring application...")
     print(f"Upload folder: {os.path.abspath(app.config['UPLOAD_FOLDER'])}")
 
-    # Ensure upload folder exists with proper permissions
-    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-    try:
-        # Create a test file to check permissions
-        test_file = os.path.join(app.config['UPLOAD_FOLDER'], 'test_write.txt')
-        with open(test_file, 'w') as f:
-            f.write('test')
-        os.remove(test_file)
+    # Same check /readyz runs
+    writable, error = check_writable(app.config['UPLOAD_FOLDER'])
+    if writable:
         print("Upload folder is writable")
-    except Exception as e:
-        print(f"Warning: Upload folder may not be writable: {e}")
+    else:
+        print(f"Warning: Upload folder may not be writable: {error}")
 
     app.run(debug=True)
@@ -0,0 +1,59 @@
+"""
+Rows per second of batch analysis from one process up to N cores
+
+    python -m benchmarks.bench_batch_scaling [rows] [workers ...]
+"""
+import os
+import sys
+import time
+import numpy as np
+from app import nutrient_model, irrigation_model
+from utils.analysis import analyze_batch, run_analysis
+from utils.compact import compact_results
+from utils.parallel import BatchPool
+from benchmarks.harness import print_table
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    worker_counts = [int(arg) for arg in sys.argv[2:]] or sorted({1, 2, 4, os.cpu_count() or 1})
+    rng = np.random.default_rng(0)
+    ph_values = rng.uniform(4.0, 9.0, rows).round(2)
+    temperatures = rng.uniform(15.0, 38.0, rows).round(1)
+    table = []
+
+    def add(mode, workers, elapsed, baseline=None):
+        table.append({'mode': mode, 'workers': workers, 'seconds': f"{elapsed:.2f}",
+                      'rows/s': f"{rows / elapsed:.0f}",
+                      'speedup': f"{baseline / elapsed:.2f}x" if baseline else '-'})
+
+    # Per-row baseline: one model call per sample, as /api/v1/analyze does
+    sample = min(rows, 500)
+    elapsed = timed(lambda: [compact_results(run_analysis(nutrient_model, irrigation_model, p, t))
+                             for p, t in zip(ph_values[:sample], temperatures[:sample])])
+    add('per-row (extrapolated)', '-', elapsed * rows / sample)
+
+    inline = timed(lambda: [compact_results(analysis) for analysis in
+                            analyze_batch(nutrient_model, irrigation_model, ph_values, temperatures)])
+    add('vectorized inline', '-', inline, inline)
+
+    for workers in worker_counts:
+        pool = BatchPool(workers)
+        # Start the processes and load their models outside the timed region
+        pool.warm_up()
+        elapsed = timed(lambda: pool.analyze(ph_values, temperatures))
+        pool.shutdown()
+        add('process pool', workers, elapsed, inline)
+
+    print_table(f'Batch analysis of {rows} rows ({os.cpu_count()} CPUs)', table,
+                ['mode', 'workers', 'seconds', 'rows/s', 'speedup'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Throughput of batch jobs run by the worker pool versus inline in the web process
+
+    python -m benchmarks.bench_jobs [samples] [workers ...]
+"""
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+from app import nutrient_model, irrigation_model
+from utils.jobs import JobQueue, execute_job, job_samples
+from benchmarks.harness import print_table
+
+
+def wait_for(queue, job_id, timeout=600):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = queue.status(job_id)
+        if status['status'] in ('done', 'failed'):
+            return status
+        time.sleep(0.05)
+    raise TimeoutError(job_id)
+
+
+def main():
+    samples = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    worker_counts = [int(arg) for arg in sys.argv[2:]] or [1, 2, 4]
+    rng = np.random.default_rng(0)
+    payload = {
+        'ph': rng.uniform(4.0, 9.0, samples).round(2).tolist(),
+        'temperature': rng.uniform(15.0, 38.0, samples).round(1).tolist()
+    }
+    rows = []
+
+    # Inline: same code path as a worker, no queue or processes involved
+    start = time.perf_counter()
+    execute_job(job_samples('batch', payload), (nutrient_model, irrigation_model))
+    elapsed = time.perf_counter() - start
+    rows.append({'mode': 'inline', 'workers': '-', 'seconds': f"{elapsed:.2f}",
+                 'samples/s': f"{samples / elapsed:.1f}"})
+
+    for workers in worker_counts:
+        with tempfile.TemporaryDirectory() as directory:
+            queue = JobQueue(os.path.join(directory, 'jobs.sqlite3'), workers)
+            queue.start()
+
+            # Warm the pool so process start-up and model loading aren't timed
+            warm = [queue.submit('single', {'ph': 6.5, 'temperature': 28.0}) for _ in range(workers)]
+            for job_id in warm:
+                wait_for(queue, job_id)
+
+            # Split the batch into one job per worker so they run concurrently
+            start = time.perf_counter()
+            job_ids = []
+            for shard in range(workers):
+                job_ids.append(queue.submit('batch', {
+                    'ph': payload['ph'][shard::workers],
+                    'temperature': payload['temperature'][shard::workers]
+                }))
+            for job_id in job_ids:
+                wait_for(queue, job_id)
+            elapsed = time.perf_counter() - start
+            queue.stop()
+
+        rows.append({'mode': 'pool', 'workers': workers, 'seconds': f"{elapsed:.2f}",
+                     'samples/s': f"{samples / elapsed:.1f}"})
+
+    print_table(f'Batch analysis of {samples} samples', rows, ['mode', 'workers', 'seconds', 'samples/s'])
+
+
+if __name__ == '__main__':
+    main()
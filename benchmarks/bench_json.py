@@ -0,0 +1,46 @@
+"""
+Payload size and encode time of the legacy /analyze JSON versus the compact /api/v1 schema
+
+    python -m benchmarks.bench_json
+"""
+import gzip
+import json
+from app import app, nutrient_model, irrigation_model
+from utils.analysis import run_analysis
+from utils.compact import compact_results
+from utils.serialization import orjson
+from benchmarks.harness import measure, print_table
+
+
+def main():
+    results = run_analysis(nutrient_model, irrigation_model, 6.5, 28.0)
+    rows = []
+
+    encoders = [('json', lambda obj: json.dumps(obj, separators=(',', ':')).encode('utf-8'))]
+    if orjson is not None:
+        encoders.append(('orjson', orjson.dumps))
+
+    cases = [('legacy', None, lambda: results)]
+    for decimals in (None, 4, 3, 2):
+        cases.append(('compact', decimals, lambda decimals=decimals: compact_results(results, decimals)))
+
+    with app.app_context():
+        for schema, decimals, build in cases:
+            payload = build()
+            for encoder_name, encode in encoders:
+                body = encode(payload)
+                stats = measure(lambda: encode(build()), repeat=5, number=2000)
+                rows.append({
+                    'schema': schema,
+                    'decimals': 'full' if decimals is None else decimals,
+                    'encoder': encoder_name,
+                    'bytes': len(body),
+                    'gzip bytes': len(gzip.compress(body)),
+                    'build+encode': f"{stats['best'] * 1e6:.1f} us"
+                })
+
+    print_table('JSON payloads', rows, ['schema', 'decimals', 'encoder', 'bytes', 'gzip bytes', 'build+encode'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Render time of the results page with and without the fragment cache
+
+    python -m benchmarks.bench_render
+"""
+from app import app, nutrient_model, irrigation_model
+from utils.disease_data import get_disease_prediction, get_disease_info
+from utils.fragments import FragmentCache, render_index
+from utils.predictions import (
+    predict_soil_nutrients,
+    predict_irrigation,
+    get_irrigation_recommendations,
+    get_fertilizer_recommendations
+)
+from benchmarks.harness import measure, print_table, format_ms
+
+
+def demo_results(ph_value=6.5, temperature=28.0):
+    soil_nutrients = predict_soil_nutrients(nutrient_model, ph_value)
+    irrigation_data = predict_irrigation(irrigation_model, temperature)
+    disease_results = get_disease_prediction(None, is_demo=True)
+    return {
+        'soil_nutrients': soil_nutrients,
+        'irrigation_data': irrigation_data,
+        'fertilizer_recommendations': get_fertilizer_recommendations(soil_nutrients),
+        'irrigation_recommendations': get_irrigation_recommendations(irrigation_data, temperature),
+        'disease_results': disease_results,
+        'disease_info': get_disease_info(disease_results['disease']),
+        'image_path': '/static/img/rice_sample.jpg',
+        'is_demo': True
+    }
+
+
+def main():
+    results = demo_results()
+    rows = []
+
+    with app.test_request_context('/analyze_demo'):
+        # Cache cleared before every call: every fragment is rendered from scratch
+        cold = FragmentCache()
+
+        def render_cold():
+            cold.clear()
+            render_index(results=results, cache=cold)
+
+        # Shared cache: only the numeric sections are rendered per call
+        warm = FragmentCache()
+        render_index(results=results, cache=warm)
+
+        for name, func in (('results page, cold fragments', render_cold),
+                           ('results page, cached fragments', lambda: render_index(results=results, cache=warm)),
+                           ('empty form, cached fragments', lambda: render_index(cache=warm))):
+            stats = measure(func)
+            rows.append({
+                'case': name,
+                'best': format_ms(stats['best']),
+                'median': format_ms(stats['median']),
+                'renders/s': f"{stats['per_second']:.0f}"
+            })
+
+    print_table('Template rendering', rows, ['case', 'best', 'median', 'renders/s'])
+
+
+if __name__ == '__main__':
+    main()
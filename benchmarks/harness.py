@@ -0,0 +1,44 @@
+import statistics
+import time
+
+
+def measure(func, repeat=5, number=100):
+    """
+    Time `func` the way timeit does, reporting per-call statistics
+
+    Args:
+        func: Zero-argument callable
+        repeat: Number of timing rounds
+        number: Calls per round
+
+    Returns:
+        dict: best/median/mean seconds per call and calls per second
+    """
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        rounds.append((time.perf_counter() - start) / number)
+
+    best = min(rounds)
+    return {
+        'best': best,
+        'median': statistics.median(rounds),
+        'mean': statistics.mean(rounds),
+        'per_second': 1.0 / best if best else float('inf')
+    }
+
+
+def print_table(title, rows, columns):
+    """Print benchmark results as an aligned text table"""
+    print(f"\n{title}")
+    widths = [max(len(str(column)), *(len(str(row.get(column, ''))) for row in rows)) for column in columns]
+    print('  '.join(str(column).ljust(width) for column, width in zip(columns, widths)))
+    print('  '.join('-' * width for width in widths))
+    for row in rows:
+        print('  '.join(str(row.get(column, '')).ljust(width) for column, width in zip(columns, widths)))
+
+
+def format_ms(seconds):
+    return f"{seconds * 1000:.3f} ms"
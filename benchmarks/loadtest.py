@@ -0,0 +1,474 @@
+"""
+Load test the app with a synthetic traffic mix described by a saved scenario
+
+    python -m benchmarks.loadtest benchmarks/scenarios/harvest_mix.json
+    python -m benchmarks.loadtest SCENARIO --gunicorn 4
+    python -m benchmarks.loadtest SCENARIO --url http://127.0.0.1:8000
+    python -m benchmarks.loadtest SCENARIO --compare benchmarks/results/previous.json
+
+Without --url or --gunicorn requests go through Flask's test client in this
+process. Every run is written to benchmarks/results/ so later runs can be
+compared against it with --compare.
+
+In-process and --gunicorn runs start from an empty result store and upload
+folder in a temporary directory, so runs don't fill static/uploads and a
+repeat run isn't served from results stored by the previous one. A server
+given with --url keeps its own state between runs.
+"""
+import argparse
+import io
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from benchmarks.harness import print_table
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+# name -> (method, path, sends the analysis form, AJAX header)
+ENDPOINTS = {
+    'analyze_page': ('POST', '/analyze', True, False),
+    'analyze_ajax': ('POST', '/analyze', True, True),
+    'analyze_demo': ('GET', '/analyze_demo', False, False),
+    'api_analyze': ('POST', '/api/v1/analyze', True, False),
+    'index': ('GET', '/', False, False),
+}
+
+PERCENTILES = (50, 90, 95, 99)
+
+# Seconds between worker memory samples
+MEMORY_INTERVAL = 0.5
+
+# Seconds to wait for gunicorn workers to load the models
+GUNICORN_START_TIMEOUT = 300
+
+# App settings pointed into a fresh temporary directory for every local run
+STATE_PATHS = {
+    'RESULT_STORE_PATH': 'results.sqlite3',
+    'UPLOAD_INDEX_PATH': 'uploads.sqlite3',
+    'UPLOAD_FOLDER': 'uploads',
+    'JOB_QUEUE_PATH': 'jobs.sqlite3',
+}
+
+
+def load_scenario(path):
+    with open(path) as f:
+        scenario = json.load(f)
+    scenario.setdefault('name', os.path.splitext(os.path.basename(path))[0])
+    return scenario
+
+
+def _sample_distribution(spec, size, rng):
+    """Draw from a {"distribution": "normal"|"uniform", ...} spec, clipped to its bounds"""
+    if spec.get('distribution', 'normal') == 'uniform':
+        values = rng.uniform(spec['low'], spec['high'], size)
+    else:
+        values = rng.normal(spec['mean'], spec['std'], size)
+    values = np.clip(values, spec.get('low', -np.inf), spec.get('high', np.inf))
+    return values.round(spec.get('decimals', 1))
+
+
+def generate_requests(scenario, count, seed=None):
+    """
+    Build the request list for a run
+
+    Args:
+        scenario: Loaded scenario dict
+        count: Number of requests
+        seed: Overrides the scenario's seed
+
+    Returns:
+        list: Request dicts with endpoint, method, path, form, image and headers
+    """
+    rng = np.random.default_rng(scenario.get('seed', 0) if seed is None else seed)
+    names = list(scenario['mix'])
+    weights = np.array([scenario['mix'][name] for name in names], dtype=float)
+    endpoints = rng.choice(names, size=count, p=weights / weights.sum())
+
+    ph_values = _sample_distribution(scenario['ph'], count, rng)
+    temperatures = _sample_distribution(scenario['temperature'], count, rng)
+
+    images = scenario.get('images', {})
+    with_image = rng.random(count) < images.get('fraction', 0.0)
+    sizes_kb = images.get('sizes_kb', [256])
+    size_weights = np.array(images.get('size_weights', [1] * len(sizes_kb)), dtype=float)
+    image_sizes = rng.choice(sizes_kb, size=count, p=size_weights / size_weights.sum())
+
+    requests = []
+    for i, name in enumerate(endpoints):
+        method, path, has_form, ajax = ENDPOINTS[name]
+        request = {'endpoint': name, 'method': method, 'path': path,
+                   'form': None, 'image': None, 'headers': {}}
+        if has_form:
+            request['form'] = {'ph': str(ph_values[i]), 'temperature': str(temperatures[i])}
+            if with_image[i]:
+                # Random bytes: the app never decodes uploads, and unique content
+                # avoids every upload collapsing onto one stored file
+                size = int(image_sizes[i]) * 1024
+                request['image'] = (f'sample_{i}.jpg', rng.bytes(size))
+        if ajax:
+            request['headers']['X-Requested-With'] = 'XMLHttpRequest'
+        requests.append(request)
+    return requests
+
+
+def isolate_state(directory):
+    """
+    Point the app's result store, job queue, upload folder and upload index into
+    `directory`. Must run before the app is imported or gunicorn is started.
+    """
+    for name, path in STATE_PATHS.items():
+        os.environ[name] = os.path.join(directory, path)
+
+
+def encode_multipart(form, image):
+    boundary = uuid.uuid4().hex
+    body = io.BytesIO()
+    for key, value in form.items():
+        body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{key}"\r\n\r\n{value}\r\n'.encode())
+    if image is not None:
+        filename, data = image
+        body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="image"; filename="{filename}"\r\n'
+                   f'Content-Type: image/jpeg\r\n\r\n'.encode())
+        body.write(data)
+        body.write(b'\r\n')
+    body.write(f'--{boundary}--\r\n'.encode())
+    return body.getvalue(), f'multipart/form-data; boundary={boundary}'
+
+
+class InProcessTarget:
+    """Send requests through Flask's test client, one client per thread"""
+
+    description = 'in-process'
+
+    def __init__(self):
+        from app import app
+        self.app = app
+        self._local = threading.local()
+
+    def send(self, request):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        data = None
+        if request['form'] is not None:
+            data = dict(request['form'])
+            if request['image'] is not None:
+                filename, content = request['image']
+                data['image'] = (io.BytesIO(content), filename)
+        response = client.open(request['path'], method=request['method'], data=data,
+                               headers=request['headers'])
+        response.get_data()
+        return response.status_code
+
+    def worker_pids(self):
+        return [os.getpid()]
+
+    def close(self):
+        pass
+
+
+class HttpTarget:
+    """Send requests over HTTP to a running server"""
+
+    def __init__(self, base_url, pids=None):
+        self.base_url = base_url.rstrip('/')
+        self.description = base_url
+        self._pids = pids or []
+
+    def send(self, request):
+        headers = dict(request['headers'])
+        body = None
+        if request['form'] is not None:
+            body, headers['Content-Type'] = encode_multipart(request['form'], request['image'])
+        http_request = urllib.request.Request(self.base_url + request['path'], data=body,
+                                              headers=headers, method=request['method'])
+        try:
+            with urllib.request.urlopen(http_request, timeout=120) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    def worker_pids(self):
+        return self._pids() if callable(self._pids) else self._pids
+
+    def close(self):
+        pass
+
+
+class GunicornTarget(HttpTarget):
+    """Start gunicorn with `workers` workers on a free local port and drive it over HTTP"""
+
+    def __init__(self, workers):
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            port = s.getsockname()[1]
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-w', str(workers), '-b', f'127.0.0.1:{port}',
+             '--timeout', '300', 'app:app'],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        super().__init__(f'http://127.0.0.1:{port}', self._children)
+        self.description = f'gunicorn -w {workers}'
+        self._wait_ready(workers)
+
+    def _children(self):
+        try:
+            with open(f'/proc/{self.process.pid}/task/{self.process.pid}/children') as f:
+                return [int(pid) for pid in f.read().split()]
+        except OSError:
+            return []
+
+    def _wait_ready(self, workers):
+        deadline = time.time() + GUNICORN_START_TIMEOUT
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError('gunicorn exited during start-up')
+            try:
+                # A response only shows that some worker has loaded the models; gunicorn may
+                # hand all of these to the same one, so the unmeasured warm-up requests sent
+                # before the run are what give the others time to finish start-up
+                for _ in range(workers):
+                    urllib.request.urlopen(self.base_url + '/', timeout=5).read()
+                return
+            except OSError:
+                time.sleep(1)
+        self.close()
+        raise TimeoutError('gunicorn did not become ready')
+
+    def close(self):
+        self.process.terminate()
+        self.process.wait()
+
+
+def rss_bytes(pid):
+    """Resident set size of a process from /proc, or None where unavailable"""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+class MemorySampler:
+    """Record the peak RSS of each worker process while a run is in progress"""
+
+    def __init__(self, target):
+        self.target = target
+        self.peaks = {}
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self):
+        for pid in self.target.worker_pids():
+            rss = rss_bytes(pid)
+            if rss is not None:
+                self.peaks[pid] = max(rss, self.peaks.get(pid, 0))
+
+    def _run(self):
+        while not self._stopping.wait(MEMORY_INTERVAL):
+            self._sample()
+
+    def __enter__(self):
+        self._sample()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stopping.set()
+        self._thread.join()
+        self._sample()
+
+    def summary(self):
+        if not self.peaks:
+            return {}
+        peaks = list(self.peaks.values())
+        return {'workers': len(peaks), 'max_worker_rss_mb': round(max(peaks) / 2 ** 20, 1),
+                'total_rss_mb': round(sum(peaks) / 2 ** 20, 1)}
+
+
+def run_load(target, requests, concurrency):
+    """
+    Send `requests` with `concurrency` closed-loop clients
+
+    Returns:
+        tuple: (list of (endpoint, seconds, ok) samples, wall-clock seconds)
+    """
+    samples = []
+    lock = threading.Lock()
+    position = iter(range(len(requests)))
+
+    def client():
+        while True:
+            with lock:
+                index = next(position, None)
+            if index is None:
+                return
+            request = requests[index]
+            start = time.perf_counter()
+            try:
+                ok = target.send(request) < 400
+            except Exception:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                samples.append((request['endpoint'], elapsed, ok))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(client) for _ in range(concurrency)]:
+            future.result()
+    return samples, time.perf_counter() - start
+
+
+def summarize(samples, wall_seconds):
+    """
+    Throughput, error rate and latency percentiles overall and per endpoint
+
+    Latencies only cover successful requests; they are None when nothing succeeded.
+    """
+    def stats(group):
+        latencies = np.array([seconds for _, seconds, ok in group if ok]) * 1000
+        errors = len(group) - len(latencies)
+        row = {'requests': len(group), 'errors': errors,
+               'error_rate': round(errors / len(group), 4) if group else 0.0,
+               'rps': round(len(group) / wall_seconds, 2) if wall_seconds > 0 else 0.0,
+               'mean_ms': None, 'max_ms': None}
+        row.update({f'p{p}_ms': None for p in PERCENTILES})
+        if len(latencies):
+            row['mean_ms'] = round(float(latencies.mean()), 2)
+            row['max_ms'] = round(float(latencies.max()), 2)
+            for p, value in zip(PERCENTILES, np.percentile(latencies, PERCENTILES)):
+                row[f'p{p}_ms'] = round(float(value), 2)
+        return row
+
+    endpoints = {}
+    for sample in samples:
+        endpoints.setdefault(sample[0], []).append(sample)
+    return {'overall': stats(samples),
+            'endpoints': {name: stats(group) for name, group in sorted(endpoints.items())}}
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report):
+    columns = ['endpoint', 'requests', 'rps', 'error_rate'] + [f'p{p}_ms' for p in PERCENTILES] + ['max_ms']
+    rows = [dict(report['overall'], endpoint='ALL')]
+    rows += [dict(stats, endpoint=name) for name, stats in report['endpoints'].items()]
+    print_table(f"{report['scenario']} against {report['target']} "
+                f"({report['concurrency']} clients, {report['wall_seconds']:.1f}s)", rows, columns)
+    if report['overall']['mean_ms'] is None:
+        print("\nFailed: no request succeeded, so there are no latencies to report")
+    if report['memory']:
+        memory = report['memory']
+        print(f"\nWorker memory: {memory['workers']} process(es), peak {memory['max_worker_rss_mb']} MB "
+              f"per worker, {memory['total_rss_mb']} MB total")
+
+
+def print_comparison(previous, report):
+    """Side-by-side overall and per-endpoint metrics of two saved runs"""
+    metrics = ['rps', 'error_rate', 'p50_ms', 'p95_ms', 'p99_ms']
+    rows = []
+    sections = [('ALL', previous['overall'], report['overall'])]
+    sections += [(name, previous['endpoints'].get(name), stats) for name, stats in report['endpoints'].items()]
+    for name, before, after in sections:
+        if before is None:
+            continue
+        for metric in metrics:
+            old, new = before[metric], after[metric]
+            change = f"{(new - old) / old * 100:+.1f}%" if old and new is not None else '-'
+            rows.append({'endpoint': name, 'metric': metric, 'before': old, 'after': new, 'change': change})
+    print_table(f"Compared with {previous.get('revision') or '?'} ({previous['started_at']})", rows,
+                ['endpoint', 'metric', 'before', 'after', 'change'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('scenario', help='Scenario JSON file')
+    parser.add_argument('--url', help='Base URL of a running server')
+    parser.add_argument('--gunicorn', type=int, metavar='WORKERS', help='Start a local gunicorn with WORKERS workers')
+    parser.add_argument('--requests', type=int, help="Overrides the scenario's request count")
+    parser.add_argument('--concurrency', type=int, help="Overrides the scenario's concurrency")
+    parser.add_argument('--seed', type=int, help="Overrides the scenario's seed")
+    parser.add_argument('--compare', help='Saved result to compare this run against')
+    parser.add_argument('--output', help='Where to save the result (default: benchmarks/results/)')
+    args = parser.parse_args()
+
+    scenario = load_scenario(args.scenario)
+    count = args.requests or scenario.get('requests', 200)
+    concurrency = args.concurrency or scenario.get('concurrency', 4)
+    seed = scenario.get('seed', 0) if args.seed is None else args.seed
+    # Warm-up traffic uses a different seed so it doesn't prime the result store for the run
+    warmup = generate_requests(scenario, scenario.get('warmup', 10), seed=seed + 1)
+    requests = generate_requests(scenario, count, seed=seed)
+
+    state_dir = None
+    if not args.url:
+        state_dir = tempfile.mkdtemp(prefix='loadtest-')
+        isolate_state(state_dir)
+
+    try:
+        if args.gunicorn:
+            target = GunicornTarget(args.gunicorn)
+        elif args.url:
+            target = HttpTarget(args.url)
+        else:
+            target = InProcessTarget()
+
+        try:
+            run_load(target, warmup, concurrency)
+            with MemorySampler(target) as memory:
+                started_at = time.strftime('%Y-%m-%dT%H:%M:%S')
+                samples, wall_seconds = run_load(target, requests, concurrency)
+        finally:
+            target.close()
+    finally:
+        if state_dir is not None:
+            shutil.rmtree(state_dir, ignore_errors=True)
+
+    report = {
+        'scenario': scenario['name'],
+        'target': target.description,
+        'revision': git_revision(),
+        'started_at': started_at,
+        'concurrency': concurrency,
+        'wall_seconds': round(wall_seconds, 3),
+        'memory': memory.summary(),
+        **summarize(samples, wall_seconds)
+    }
+    print_report(report)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{scenario['name']}-{started_at.replace(':', '')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(json.load(f), report)
+
+
+if __name__ == '__main__':
+    main()
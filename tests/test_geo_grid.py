@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from utils.geo_grid import GridIndex, idw_grid, project_points, unproject_point
+
+
+def brute_force_idw(index, values, power, radius_cells):
+    """Reference IDW: every cell centre against every point"""
+    rows, cols = np.mgrid[0:index.rows, 0:index.cols]
+    centre_x = index.min_x + cols.ravel() * index.cell_size
+    centre_y = index.max_y - rows.ravel() * index.cell_size
+    distance = np.hypot(centre_x[:, None] - index.x[None, :], centre_y[:, None] - index.y[None, :])
+    weights = np.where(distance <= radius_cells * index.cell_size,
+                       np.maximum(distance, index.cell_size * 1e-3) ** -power, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        grid = weights @ values / weights.sum(axis=1)[:, None]
+    return grid.reshape(index.rows, index.cols, values.shape[1])
+
+
+@pytest.mark.parametrize('power, radius_cells', [(2.0, 3), (1.0, 1), (3.0, 5)])
+def test_idw_matches_brute_force(power, radius_cells):
+    rng = np.random.default_rng(7)
+    # Clustered points, some sharing a cell, leaving empty cells in between
+    x = np.concatenate([rng.uniform(0, 200, 150), rng.normal(400, 5, 50)])
+    y = np.concatenate([rng.uniform(0, 120, 150), rng.normal(60, 5, 50)])
+    values = rng.uniform(0, 10, (len(x), 3))
+    index = GridIndex(x, y, cell_size=10.0)
+
+    grid = idw_grid(index, values, power, radius_cells)
+    expected = brute_force_idw(index, values, power, radius_cells)
+
+    assert grid.shape == (index.rows, index.cols, 3)
+    np.testing.assert_array_equal(np.isnan(grid), np.isnan(expected))
+    assert np.isnan(grid).any()
+    np.testing.assert_allclose(grid[~np.isnan(grid)], expected[~np.isnan(expected)], rtol=1e-9)
+
+
+def test_point_on_cell_centre_keeps_its_value():
+    x = np.array([0.0, 20.0])
+    y = np.array([0.0, 0.0])
+    grid = idw_grid(GridIndex(x, y, cell_size=10.0), np.array([[1.0], [5.0]]), radius_cells=3)
+    assert grid[0, 0, 0] == pytest.approx(1.0, abs=1e-4)
+    assert grid[0, 2, 0] == pytest.approx(5.0, abs=1e-4)
+    assert grid[0, 1, 0] == pytest.approx(3.0)
+
+
+def test_rejects_oversized_rasters():
+    with pytest.raises(ValueError, match='cell_size'):
+        GridIndex(np.array([0.0, 30000.0]), np.array([0.0, 30000.0]), cell_size=10.0)
+
+
+def test_projection_round_trip():
+    lat = np.array([52.10, 52.11, 52.12])
+    lon = np.array([5.10, 5.12, 5.13])
+    x, y, origin = project_points(lat, lon)
+    back_lat, back_lon = unproject_point(x, y, origin)
+    np.testing.assert_allclose(back_lat, lat, atol=1e-9)
+    np.testing.assert_allclose(back_lon, lon, atol=1e-9)
+
+
+def test_oversized_raster_is_rejected_before_allocating():
+    x = np.array([0.0, 1000.0])
+    y = np.array([0.0, 1000.0])
+    with pytest.raises(ValueError, match='cell_size'):
+        GridIndex(x, y, cell_size=0.5)
+    assert GridIndex(x, y, cell_size=2.0).rows == 501
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from utils.irrigation_planner import plan_irrigation
+from utils.model_loader import get_scalers
+from utils.predictions import (
+    get_irrigation_recommendations,
+    get_temperature_status,
+    predict_irrigation,
+    IRRIGATION_STATUSES,
+    RAINFALL_THRESHOLDS,
+    TEMPERATURE_STATUSES,
+    TEMPERATURE_THRESHOLDS
+)
+
+
+class RampModel:
+    """Irrigation model stand-in whose rainfall rises from 50mm at 10C to 500mm at 40C"""
+
+    def predict(self, inputs, batch_size=None, verbose=0):
+        X_scaler, y_scaler = get_scalers()
+        temperatures = X_scaler.inverse_transform(inputs)[:, 0]
+        outputs = np.zeros((len(temperatures), y_scaler.n_features_in_))
+        outputs[:, 0] = 50 + (temperatures - 10) * 15
+        outputs[:, 1] = 0.3 + (temperatures - 10) * 0.02
+        return y_scaler.transform(outputs)[:, :2]
+
+
+def test_plan_statuses_match_predict_irrigation():
+    model = RampModel()
+    # Every threshold exactly, values either side of them, and the clamped extremes
+    temperatures = np.unique(np.concatenate([
+        np.linspace(0, 50, 101), TEMPERATURE_THRESHOLDS, (np.array(RAINFALL_THRESHOLDS) - 50) / 15 + 10
+    ]))
+
+    plan = plan_irrigation(model, temperatures)
+
+    seen = set()
+    for day, temperature in enumerate(temperatures):
+        irrigation = predict_irrigation(model, float(temperature))
+        recommendations = get_irrigation_recommendations(irrigation, temperature)
+        assert TEMPERATURE_STATUSES[plan['temperature_status'][0, day]] == irrigation['temperature_status']['status']
+        assert IRRIGATION_STATUSES[plan['irrigation_status'][0, day]] == recommendations['irrigation_status']
+        seen.add(recommendations['irrigation_status'])
+    assert seen == set(IRRIGATION_STATUSES)
+
+
+@pytest.mark.parametrize('temperature, status', [(19.9, 'cold'), (20, 'cool'), (30, 'hot'), (35, 'extreme')])
+def test_temperature_status_thresholds(temperature, status):
+    assert get_temperature_status(temperature)['status'] == status
@@ -0,0 +1,92 @@
+import pytest
+from flask import Flask
+from werkzeug.middleware.proxy_fix import ProxyFix
+from utils import rate_limit
+from utils.rate_limit import MemoryBuckets, SQLiteBuckets, init_rate_limiting
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def make_buckets(request, tmp_path):
+    def make(rate, burst):
+        if request.param == 'memory':
+            return MemoryBuckets(rate, burst)
+        return SQLiteBuckets(str(tmp_path / 'buckets.sqlite3'), rate, burst)
+    return make
+
+
+def test_burst_then_refill(make_buckets):
+    buckets = make_buckets(rate=2.0, burst=3)
+    assert [buckets.take('a', now=100.0)[0] for _ in range(4)] == [True, True, True, False]
+
+    allowed, retry_after = buckets.take('a', now=100.0)
+    assert not allowed
+    assert retry_after == pytest.approx(0.5)
+
+    # Half a second refills one token, and buckets never hold more than the burst
+    assert buckets.take('a', now=100.5) == (True, 0.0)
+    assert [buckets.take('a', now=1000.0)[0] for _ in range(4)] == [True, True, True, False]
+
+
+def test_clients_have_separate_buckets(make_buckets):
+    buckets = make_buckets(rate=1.0, burst=1)
+    assert buckets.take('a', now=0.0)[0]
+    assert not buckets.take('a', now=0.0)[0]
+    assert buckets.take('b', now=0.0)[0]
+
+
+def test_sqlite_buckets_are_shared_between_workers(tmp_path):
+    path = str(tmp_path / 'buckets.sqlite3')
+    first, second = SQLiteBuckets(path, 1.0, 2), SQLiteBuckets(path, 1.0, 2)
+    assert first.take('a', now=0.0)[0]
+    assert second.take('a', now=0.0)[0]
+    assert not first.take('a', now=0.0)[0]
+
+
+def test_memory_sweep_stays_bounded(monkeypatch):
+    monkeypatch.setattr(rate_limit, 'MAX_BUCKETS', 100)
+    buckets = MemoryBuckets(rate=0.001, burst=5)
+    for i in range(1000):
+        buckets.take(f'client-{i}', now=float(i))
+        assert len(buckets._buckets) <= 100
+    # The most recently seen clients keep their (partly used) buckets
+    assert 'client-999' in buckets._buckets
+    assert 'client-0' not in buckets._buckets
+
+
+def limited_app(**config):
+    app = Flask(__name__)
+    app.config.update(RATE_LIMIT_PER_SECOND=1.0, RATE_LIMIT_BURST=2, INFERENCE_CONCURRENCY=0, **config)
+
+    @app.route('/predict')
+    def predict():
+        return 'ok'
+
+    init_rate_limiting(app, {'predict'}, set())
+    return app.test_client()
+
+
+def test_unknown_api_keys_share_the_address_limit():
+    client = limited_app(RATE_LIMIT_API_KEYS=['known'])
+    statuses = [client.get('/predict', headers={'X-API-Key': f'made-up-{i}'}).status_code for i in range(5)]
+    assert statuses == [200, 200, 429, 429, 429]
+
+
+def test_configured_api_key_gets_its_own_bucket():
+    client = limited_app(RATE_LIMIT_API_KEYS=['known'])
+    assert [client.get('/predict').status_code for _ in range(3)] == [200, 200, 429]
+
+    response = client.get('/predict', headers={'X-API-Key': 'known'})
+    assert response.status_code == 200
+    assert [client.get('/predict', headers={'X-API-Key': 'known'}).status_code for _ in range(2)] == [200, 429]
+    assert int(client.get('/predict').headers['Retry-After']) >= 1
+
+
+def test_forwarded_addresses_only_count_behind_a_trusted_proxy():
+    client = limited_app()
+    spoofed = [client.get('/predict', headers={'X-Forwarded-For': f'10.0.0.{i}'}).status_code for i in range(3)]
+    assert spoofed == [200, 200, 429]
+
+    client = limited_app()
+    client.application.wsgi_app = ProxyFix(client.application.wsgi_app, x_for=1)
+    forwarded = [client.get('/predict', headers={'X-Forwarded-For': f'10.0.0.{i}'}).status_code for i in range(3)]
+    assert forwarded == [200, 200, 200]
@@ -0,0 +1,50 @@
+import threading
+import time
+from utils.result_store import ResultStore, request_digest
+
+
+def test_inputs_are_normalized_before_hashing():
+    assert request_digest(6.5, 25) == request_digest('6.50000001', 25.0)
+    assert request_digest(6.5, 25) != request_digest(6.5, 25, image_hash='abc')
+
+
+def test_stores_results_across_instances(tmp_path):
+    path = str(tmp_path / 'results.sqlite3')
+    assert ResultStore(path).get_or_compute('k', lambda: {'value': 1}) == ({'value': 1}, False)
+    assert ResultStore(path).get_or_compute('k', lambda: {'value': 2}) == ({'value': 1}, True)
+
+
+def test_evicts_least_recently_used(tmp_path):
+    store = ResultStore(str(tmp_path / 'results.sqlite3'), max_entries=2)
+    store.put('a', 1)
+    store.put('b', 2)
+    with store._connection() as conn:
+        conn.execute("UPDATE results SET accessed_at = accessed_at - 10 WHERE key = 'b'")
+    store.put('c', 3)
+    assert (store.get('a'), store.get('b'), store.get('c')) == (1, None, 3)
+
+
+def test_concurrent_misses_compute_once(tmp_path):
+    store = ResultStore(str(tmp_path / 'results.sqlite3'))
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return {'value': 1}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(store.get_or_compute('k', compute)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert sorted(hit for _, hit in results) == [False, True, True, True]
+
+
+def test_disabled_store_always_computes():
+    store = ResultStore(None)
+    assert store.get_or_compute('k', lambda: 1) == (1, False)
+    assert store.get_or_compute('k', lambda: 2) == (2, False)
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from utils.sensor_store import SensorStore, readings_to_columns, MAX_CLOCK_SKEW
+
+NOW = 1_700_000_000.0
+
+
+def test_rejects_timestamps_in_milliseconds():
+    with pytest.raises(ValueError, match=r'timestamp\[1\]'):
+        readings_to_columns([{'timestamp': NOW, 'ph': 6.5}, {'timestamp': NOW * 1000, 'ph': 6.6}], now=NOW)
+
+
+def test_rejects_future_and_negative_timestamps():
+    with pytest.raises(ValueError):
+        readings_to_columns({'timestamp': [NOW + MAX_CLOCK_SKEW + 1], 'ph': [6.5]}, now=NOW)
+    with pytest.raises(ValueError):
+        readings_to_columns({'timestamp': [-1.0], 'ph': [6.5]}, now=NOW)
+
+
+def test_accepts_small_clock_skew_and_missing_timestamps():
+    columns = readings_to_columns([{'timestamp': NOW + 60, 'ph': 6.5}, {'ph': 6.7}], now=NOW)
+    times, values = columns['ph']
+    assert times.tolist() == [NOW + 60, NOW]
+    assert values.tolist() == [6.5, 6.7]
+
+
+def test_bad_batch_does_not_block_later_readings(tmp_path):
+    store = SensorStore(str(tmp_path))
+    with pytest.raises(ValueError):
+        store.ingest('field-1', readings_to_columns({'timestamp': [1e12], 'ph': [6.5]}, now=NOW))
+
+    counts = store.ingest('field-1', readings_to_columns({'timestamp': [NOW - 10, NOW], 'ph': [6.0, 7.0]}, now=NOW))
+    assert counts == {'accepted': 2, 'rejected': 0}
+    summary = store.aggregates('field-1')['ph']
+    assert summary['latest_timestamp'] == NOW
+    assert np.isclose(summary['windows']['1h']['mean'], 6.5)
+
+
+@pytest.mark.parametrize('payload', [
+    {'ph': [[6.5, 6.6]]},
+    {'timestamp': [[NOW]], 'ph': [6.5]},
+    {'ph': '6.5'},
+])
+def test_rejects_columns_that_are_not_flat_lists(payload):
+    with pytest.raises(ValueError):
+        readings_to_columns(payload, now=NOW)
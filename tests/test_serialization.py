@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+from utils import serialization
+from utils.serialization import dumps, loads
+
+
+@pytest.fixture(params=['orjson', 'stdlib'])
+def encoder(request, monkeypatch):
+    if request.param == 'orjson':
+        if serialization.orjson is None:
+            pytest.skip('orjson is not installed')
+    else:
+        monkeypatch.setattr(serialization, 'orjson', None)
+    return request.param
+
+
+def test_numpy_values_encode_with_either_encoder(encoder):
+    data = {
+        'count': np.int64(3),
+        'ph': np.float32(6.5),
+        'ok': np.bool_(True),
+        'rainfall': np.array([120.5, 80.25]),
+        'codes': np.arange(3, dtype=np.uint8)
+    }
+    assert loads(dumps(data)) == {'count': 3, 'ph': 6.5, 'ok': True, 'rainfall': [120.5, 80.25], 'codes': [0, 1, 2]}
+
+
+def test_unknown_types_are_still_rejected(encoder):
+    with pytest.raises(TypeError):
+        dumps({'value': object()})
@@ -0,0 +1,92 @@
+import os
+import time
+import pytest
+from utils.db import connect
+from utils.upload_store import UploadStore
+
+DAY = 24 * 60 * 60
+
+
+@pytest.fixture
+def store(tmp_path):
+    return UploadStore(str(tmp_path / 'uploads'), str(tmp_path / 'uploads.sqlite3'), ttl=DAY, max_bytes=1000)
+
+
+def files_on_disk(store):
+    return sorted(os.path.relpath(os.path.join(directory, name), store.root).replace(os.sep, '/')
+                  for directory, _, names in os.walk(store.root) for name in names)
+
+
+def test_identical_bytes_share_one_tracked_file(store):
+    first = store.save(b'x' * 100, 'a.jpg')
+    second = store.save(b'x' * 100, 'b.png')
+    assert second == first
+    assert files_on_disk(store) == [first]
+    assert store.stats() == {'files': 1, 'bytes': 100}
+
+
+def test_compact_removes_expired_uploads_and_empty_shards(store):
+    old = store.save(b'old' * 10, 'old.jpg')
+    new = store.save(b'new' * 10, 'new.jpg')
+    store.touch(new)
+
+    with store._connection() as conn:
+        conn.execute("UPDATE uploads SET accessed_at = accessed_at - ? WHERE path = ?", (2 * DAY, old))
+
+    assert store.compact() == {'files': 1, 'bytes': 30}
+    assert files_on_disk(store) == [new]
+    assert not os.path.exists(os.path.join(store.root, old.split('/')[0]))
+    assert store.latest_image() == new
+
+
+def test_compact_evicts_least_recently_used_over_budget(store):
+    paths = [store.save(bytes([i]) * 400, f'{i}.png') for i in range(3)]
+    # The oldest upload was used most recently, so the second one goes first
+    with store._connection() as conn:
+        for age, path in zip((0, 30, 20), paths):
+            conn.execute("UPDATE uploads SET accessed_at = accessed_at - ? WHERE path = ?", (age, path))
+
+    assert store.compact() == {'files': 1, 'bytes': 400}
+    assert files_on_disk(store) == sorted([paths[0], paths[2]])
+    assert store.stats() == {'files': 2, 'bytes': 800}
+
+
+def test_compact_keeps_uploads_touched_after_selection(store, monkeypatch):
+    path = store.save(b'old' * 10, 'old.jpg')
+    with store._connection() as conn:
+        conn.execute("UPDATE uploads SET accessed_at = accessed_at - ? WHERE path = ?", (2 * DAY, path))
+
+    class TouchBeforeDelete:
+        """Connection wrapper that lets another worker use the upload right before compact deletes it"""
+
+        def __init__(self, conn):
+            self.conn = conn
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            return self.conn.__exit__(*exc_info)
+
+        def execute(self, sql, *args):
+            if sql.startswith('DELETE'):
+                other = connect(store.index_path)
+                with other:
+                    other.execute("UPDATE uploads SET accessed_at = ? WHERE path = ?", (time.time(), path))
+                other.close()
+            return self.conn.execute(sql, *args)
+
+    connection = store._connection
+    monkeypatch.setattr(store, '_connection', lambda: TouchBeforeDelete(connection()))
+
+    assert store.compact() == {'files': 0, 'bytes': 0}
+    assert files_on_disk(store) == [path]
+
+
+def test_adopts_flat_uploads_in_place(tmp_path):
+    root = tmp_path / 'uploads'
+    root.mkdir()
+    (root / 'legacy.jpg').write_bytes(b'legacy')
+    store = UploadStore(str(root), str(tmp_path / 'uploads.sqlite3'))
+    assert store.latest_image() == 'legacy.jpg'
+    assert store.stats() == {'files': 1, 'bytes': 6}
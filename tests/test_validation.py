@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+from utils.validation import (
+    ValidationError,
+    GEO_SAMPLE_SCHEMA,
+    parse_number,
+    parse_sample,
+    parse_column,
+    parse_columns,
+    check_range
+)
+
+
+@pytest.mark.parametrize('value, expected', [(6.5, 6.5), (7, 7.0), ('6.5', 6.5), (' 14 ', 14.0), (0, 0.0)])
+def test_parse_number_accepts_numbers_and_numeric_strings(value, expected):
+    assert parse_number('ph', value, 0, 14) == expected
+
+
+@pytest.mark.parametrize('value', [True, False, None, 'abc', '', 'nan', 'inf', float('nan'), 1e9, -0.1,
+                                   '1' * 40, [6.5], {'ph': 6.5}])
+def test_parse_number_rejects(value):
+    with pytest.raises(ValidationError) as error:
+        parse_number('ph', value, 0, 14)
+    assert error.value.field == 'ph'
+
+
+def test_parse_sample_defaults_and_required():
+    assert parse_sample({}) == {'ph': 7.0, 'temperature': 25.0}
+    assert parse_sample({'ph': '', 'temperature': '30'}) == {'ph': 7.0, 'temperature': 30.0}
+    with pytest.raises(ValidationError, match='ph is required'):
+        parse_sample({'temperature': 30}, required=True)
+    with pytest.raises(ValidationError):
+        parse_sample(['ph', 6.5])
+
+
+@pytest.mark.parametrize('values', [[6.5, True], [6.5, 'abc'], [6.5, None], [[6.5]], [6.5, 15.0],
+                                    [6.5, float('nan')], ['1' * 40], '6.5'])
+def test_parse_column_rejects(values):
+    with pytest.raises(ValidationError):
+        parse_column('ph', values, 0, 14)
+
+
+def test_parse_column_follows_parse_number():
+    # Whatever parse_number accepts in a form field is accepted in a column too
+    assert parse_column('ph', [6.5, 7, '6.5'], 0, 14).tolist() == [6.5, 7.0, 6.5]
+
+
+def test_parse_columns_rows_and_columns_agree():
+    columns = parse_columns({'ph': [6.5, 7.0], 'temperature': [20, 30]})
+    rows = parse_columns({'samples': [{'ph': 6.5, 'temperature': 20}, {'ph': 7.0, 'temperature': 30}]})
+    for name in ('ph', 'temperature'):
+        assert columns[name].dtype == np.float64
+        np.testing.assert_array_equal(columns[name], rows[name])
+
+
+@pytest.mark.parametrize('payload, message', [
+    ({'ph': [6.5]}, 'Missing columns'),
+    ({'ph': [6.5, 7.0], 'temperature': [20]}, 'same length'),
+    ({'ph': [], 'temperature': []}, 'empty'),
+    ({'samples': [{'ph': 6.5}]}, r'temperature\[0\] must be a number'),
+    ({'samples': [1, 2]}, 'list of objects'),
+    ([1, 2], 'JSON object'),
+])
+def test_parse_columns_rejects(payload, message):
+    with pytest.raises(ValidationError, match=message):
+        parse_columns(payload)
+
+
+def test_parse_columns_row_limit_is_checked_first():
+    with pytest.raises(ValidationError, match='At most 2'):
+        parse_columns({'ph': ['x'] * 3, 'temperature': ['x'] * 3}, max_rows=2)
+
+
+def test_geo_schema_requires_coordinates():
+    with pytest.raises(ValidationError, match=r'lat\[0\] must be between -90 and 90'):
+        parse_columns({'lat': [91], 'lon': [0], 'ph': [6.5], 'temperature': [20]}, GEO_SAMPLE_SCHEMA)
+
+
+def test_check_range_reports_first_offender():
+    check_range('t', np.array([1.0, np.nan]), 0, 2, allow_nan=True)
+    with pytest.raises(ValidationError, match=r't\[1\]\[0\] must be between 0 and 2'):
+        check_range('t', np.array([[1.0, 1.0], [3.0, 1.0]]), 0, 2)
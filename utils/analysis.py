@@ -0,0 +1,100 @@
+import numpy as np
+from .predictions import (
+    predict_soil_nutrients,
+    predict_soil_nutrients_batch,
+    predict_irrigation,
+    predict_irrigation_batch,
+    format_soil_nutrients,
+    format_irrigation,
+    get_irrigation_recommendations,
+    get_fertilizer_recommendations
+)
+from .disease_data import get_disease_prediction, get_disease_info
+
+
+def run_analysis(nutrient_model, irrigation_model, ph_value, temperature, image_path=None, is_demo=False):
+    """
+    Run every model and recommendation builder for one sample
+
+    Args:
+        nutrient_model: Loaded soil nutrient model
+        irrigation_model: Loaded irrigation model
+        ph_value: Soil pH value
+        temperature: Temperature value in Celsius
+        image_path: URL of the uploaded plant image, if any
+        is_demo: Whether this is the demo analysis
+
+    Returns:
+        dict: Results in the shape expected by index.html and the JSON API
+    """
+    # Make predictions
+    soil_nutrients = predict_soil_nutrients(nutrient_model, ph_value)
+    irrigation_data = predict_irrigation(irrigation_model, temperature)
+
+    # Get recommendations
+    fertilizer_recommendations = get_fertilizer_recommendations(soil_nutrients)
+    irrigation_recommendations = get_irrigation_recommendations(irrigation_data, temperature)
+
+    # For disease, use hardcoded predictions since model is unavailable
+    disease_results = get_disease_prediction(image_path, is_demo=is_demo)
+    disease_info = get_disease_info(disease_results['disease'])
+
+    results = {
+        'soil_nutrients': soil_nutrients,
+        'irrigation_data': irrigation_data,
+        'fertilizer_recommendations': fertilizer_recommendations,
+        'irrigation_recommendations': irrigation_recommendations,
+        'disease_results': disease_results,
+        'disease_info': disease_info,
+        'image_path': image_path
+    }
+    if is_demo:
+        results['is_demo'] = True
+    return results
+
+
+def analyze_batch(nutrient_model, irrigation_model, ph_values, temperatures, image_paths=None):
+    """
+    Analyze many samples with one model call per model
+
+    Produces the same per-sample results as run_analysis, but the soil and
+    irrigation models each see the whole batch at once; only the
+    recommendation builders run per sample.
+
+    Args:
+        nutrient_model: Loaded soil nutrient model
+        irrigation_model: Loaded irrigation model
+        ph_values: Sequence of soil pH values
+        temperatures: Sequence of temperatures in Celsius, same length as ph_values
+        image_paths: Optional image URL per sample
+
+    Returns:
+        list: One results dict per sample
+    """
+    ph_values = np.asarray(ph_values, dtype=np.float64).reshape(-1)
+    temperatures = np.clip(np.asarray(temperatures, dtype=np.float64).reshape(-1), 10, 40)
+    if image_paths is None:
+        image_paths = [None] * len(ph_values)
+
+    nutrient_values = predict_soil_nutrients_batch(nutrient_model, ph_values)
+    rainfall, water_efficiency = predict_irrigation_batch(irrigation_model, temperatures)
+
+    batch = []
+    for i in range(len(ph_values)):
+        ph_value = float(ph_values[i])
+        temperature = float(temperatures[i])
+
+        soil_nutrients = format_soil_nutrients(ph_value, nutrient_values[i])
+        irrigation_data = format_irrigation(temperature, rainfall[i], water_efficiency[i])
+        disease_results = get_disease_prediction(image_paths[i])
+
+        batch.append({
+            'soil_nutrients': soil_nutrients,
+            'irrigation_data': irrigation_data,
+            'fertilizer_recommendations': get_fertilizer_recommendations(soil_nutrients),
+            'irrigation_recommendations': get_irrigation_recommendations(irrigation_data, temperature),
+            'disease_results': disease_results,
+            'disease_info': get_disease_info(disease_results['disease']),
+            'image_path': image_paths[i]
+        })
+    return batch
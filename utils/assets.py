@@ -0,0 +1,127 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+from flask import abort, request, url_for
+from .compression import brotli, encoded_etag, negotiate_encoding
+
+# Static sub-directories whose files get content-hashed names
+ASSET_DIRS = ('css', 'js', 'img')
+
+# Hex digits of the content hash embedded in each file name
+FINGERPRINT_LENGTH = 12
+
+# Fingerprinted URLs change whenever the content does, so they can be cached forever
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Text assets worth keeping precompressed copies of
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.svg', '.json', '.txt'}
+
+
+def fingerprint_name(filename, data):
+    """Insert the content hash before the extension: css/style.css -> css/style.<hash>.css"""
+    digest = hashlib.sha256(data).hexdigest()[:FINGERPRINT_LENGTH]
+    root, ext = os.path.splitext(filename)
+    return f"{root}.{digest}{ext}", digest
+
+
+class AssetManifest:
+    """
+    Content-hashed copies of the static assets, kept in memory
+
+    Built once at startup. Every file under ASSET_DIRS is read, given a
+    fingerprinted name, and text assets also get gzip (and brotli, when the
+    module is installed) variants so they are never compressed per request.
+    """
+
+    def __init__(self, static_folder, directories=ASSET_DIRS):
+        self.static_folder = static_folder
+        self.directories = directories
+        # Original name -> fingerprinted name
+        self.names = {}
+        # Fingerprinted name -> asset entry
+        self.assets = {}
+
+    def build(self):
+        self.names.clear()
+        self.assets.clear()
+        for directory in self.directories:
+            root = os.path.join(self.static_folder, directory)
+            if not os.path.isdir(root):
+                continue
+            for dirpath, _, filenames in os.walk(root):
+                for name in filenames:
+                    path = os.path.join(dirpath, name)
+                    filename = os.path.relpath(path, self.static_folder).replace(os.sep, '/')
+                    self.add(filename, path)
+        return self
+
+    def add(self, filename, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        hashed_name, digest = fingerprint_name(filename, data)
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+        variants = {'identity': data}
+        if os.path.splitext(filename)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+            variants['gzip'] = gzip.compress(data, compresslevel=9, mtime=0)
+            if brotli is not None:
+                variants['br'] = brotli.compress(data, quality=11)
+
+        # Only keep variants that actually save bytes
+        variants = {encoding: body for encoding, body in variants.items()
+                    if encoding == 'identity' or len(body) < len(data)}
+
+        self.names[filename] = hashed_name
+        self.assets[hashed_name] = {
+            'filename': filename,
+            'digest': digest,
+            'mimetype': mimetype,
+            'variants': variants
+        }
+
+    def url(self, filename):
+        """URL of the fingerprinted asset, or the plain static URL for unknown files"""
+        hashed_name = self.names.get(filename)
+        if hashed_name is None:
+            return url_for('static', filename=filename)
+        return url_for('fingerprinted_asset', filename=hashed_name)
+
+
+def init_assets(app, manifest=None):
+    """
+    Fingerprint the static assets and register the route and template helper serving them
+
+    Templates reference assets with {{ asset_url('css/style.css') }}.
+    """
+    if manifest is None:
+        manifest = AssetManifest(app.static_folder).build()
+    app.extensions['asset_manifest'] = manifest
+
+    @app.route('/assets/<path:filename>')
+    def fingerprinted_asset(filename):
+        asset = manifest.assets.get(filename)
+        if asset is None:
+            abort(404)
+
+        encoding = negotiate_encoding(request.accept_encodings, asset['variants'])
+        etag = encoded_etag(asset['digest'], encoding)
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+        else:
+            response = app.response_class(asset['variants'][encoding], mimetype=asset['mimetype'])
+            if encoding != 'identity':
+                response.headers['Content-Encoding'] = encoding
+
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        response.vary.add('Accept-Encoding')
+        return response
+
+    @app.context_processor
+    def asset_helpers():
+        return {'asset_url': manifest.url}
+
+    print(f"Fingerprinted {len(manifest.assets)} static assets")
+    return manifest
@@ -0,0 +1,111 @@
+import hashlib
+from .disease_data import RICE_DISEASES, DISEASE_LIST
+from .predictions import (
+    NUTRIENT_NAMES,
+    NUTRIENT_UNITS,
+    NUTRIENT_RANGES,
+    IRRIGATION_STATUSES,
+    IRRIGATION_SCHEDULES,
+    TEMPERATURE_STATUSES,
+    TEMPERATURE_THRESHOLDS,
+    FERTILIZER_MESSAGES,
+    IRRIGATION_MESSAGES,
+    get_temperature_status
+)
+from .serialization import dumps
+
+API_VERSION = 1
+
+# Nutrient statuses in the order used by the compact codes
+NUTRIENT_STATUSES = ['deficient', 'low', 'optimal', 'excessive']
+
+# Decimal places kept for floats in compact responses (see benchmarks/bench_json.py)
+COMPACT_DECIMALS = 3
+
+FERTILIZER_CODES = sorted(FERTILIZER_MESSAGES)
+IRRIGATION_CODES = sorted(IRRIGATION_MESSAGES)
+
+_FERTILIZER_INDEX = {code: i for i, code in enumerate(FERTILIZER_CODES)}
+_IRRIGATION_INDEX = {code: i for i, code in enumerate(IRRIGATION_CODES)}
+_NUTRIENT_STATUS_INDEX = {status: i for i, status in enumerate(NUTRIENT_STATUSES)}
+_DISEASE_INDEX = {disease: i for i, disease in enumerate(DISEASE_LIST)}
+
+
+def build_reference_data():
+    """
+    Static data that compact responses refer to by index
+
+    Clients fetch this once and cache it; its ETag only changes when the
+    reference data itself changes.
+
+    Returns:
+        dict: Nutrients, statuses, disease descriptions and recommendation texts
+    """
+    return {
+        'version': API_VERSION,
+        'nutrients': [
+            {'name': name, 'unit': unit, 'ranges': NUTRIENT_RANGES[name]}
+            for name, unit in zip(NUTRIENT_NAMES, NUTRIENT_UNITS)
+        ],
+        'nutrient_statuses': NUTRIENT_STATUSES,
+        # The lowest temperature of each status, to look up its label and description
+        'temperature_statuses': [
+            get_temperature_status(t) for t in [TEMPERATURE_THRESHOLDS[0] - 1] + TEMPERATURE_THRESHOLDS
+        ],
+        'irrigation_statuses': [
+            {'status': status, 'schedule': IRRIGATION_SCHEDULES[status]} for status in IRRIGATION_STATUSES
+        ],
+        'diseases': [dict(RICE_DISEASES[disease], name=disease) for disease in DISEASE_LIST],
+        # Fertilizer texts may contain a {ph} placeholder filled in from the response's ph
+        'fertilizer_recommendations': [FERTILIZER_MESSAGES[code] for code in FERTILIZER_CODES],
+        'irrigation_recommendations': [IRRIGATION_MESSAGES[code] for code in IRRIGATION_CODES]
+    }
+
+
+REFERENCE_BODY = dumps(build_reference_data())
+REFERENCE_ETAG = hashlib.sha256(REFERENCE_BODY).hexdigest()[:16]
+
+
+def compact_results(results, decimals=COMPACT_DECIMALS):
+    """
+    Reduce full analysis results to numbers and indexes into the reference data
+
+    Args:
+        results: Output of run_analysis
+        decimals: Decimal places kept for floats, None to keep full precision
+
+    Returns:
+        dict: Compact, versioned result
+    """
+    def number(value):
+        return float(value) if decimals is None else round(float(value), decimals)
+
+    soil = results['soil_nutrients']
+    irrigation = results['irrigation_data']
+    disease = results['disease_results']
+    probabilities = disease['probabilities']
+
+    return {
+        'v': API_VERSION,
+        'ph': soil['ph'],
+        'nutrients': [number(nutrient['value']) for nutrient in soil['nutrients']],
+        'nutrient_status': [_NUTRIENT_STATUS_INDEX[nutrient['status']] for nutrient in soil['nutrients']],
+        'temperature': irrigation['temperature'],
+        'temperature_status': TEMPERATURE_STATUSES.index(irrigation['temperature_status']['status']),
+        'rainfall': number(irrigation['rainfall']),
+        'water_efficiency': number(irrigation['water_efficiency']),
+        'total_water_need': number(irrigation['total_water_need']),
+        'irrigation_required': number(irrigation['irrigation_required']),
+        'irrigation_applied': number(irrigation['irrigation_applied']),
+        'irrigation_status': IRRIGATION_STATUSES.index(results['irrigation_recommendations']['irrigation_status']),
+        'fertilizer_recommendations': [
+            _FERTILIZER_INDEX[code] for code in results['fertilizer_recommendations']['codes']
+        ],
+        'irrigation_recommendations': [
+            _IRRIGATION_INDEX[code] for code in results['irrigation_recommendations']['codes']
+        ],
+        'disease': _DISEASE_INDEX[disease['disease']],
+        'disease_confidence': disease['confidence'],
+        'disease_probabilities': [number(probabilities.get(name, 0.0)) for name in DISEASE_LIST],
+        'image_path': results['image_path']
+    }
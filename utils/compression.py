@@ -0,0 +1,94 @@
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    # Brotli is optional; gzip is always available
+    brotli = None
+
+# Dynamic responses worth compressing (status rasters are long runs of a few byte values)
+COMPRESSIBLE_MIMETYPES = {'text/html', 'application/json', 'application/vnd.agrovision.raster'}
+
+# Responses smaller than this (bytes) aren't worth the CPU
+MIN_COMPRESS_SIZE = 1024
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Preferred order when the client accepts several encodings equally
+ENCODING_PREFERENCE = ('br', 'gzip')
+
+# Appended to strong ETags, since every encoding is a different byte sequence
+ETAG_SUFFIXES = {'br': 'br', 'gzip': 'gz'}
+
+
+def negotiate_encoding(accept_encodings, available):
+    """
+    Pick the best content encoding both sides support
+
+    Args:
+        accept_encodings: The request's parsed Accept-Encoding header
+        available: Encodings that can be produced
+
+    Returns:
+        str: 'br', 'gzip' or 'identity'
+    """
+    best = 'identity'
+    best_quality = 0
+    for encoding in ENCODING_PREFERENCE:
+        if encoding not in available:
+            continue
+        quality = accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def encoded_etag(etag, encoding):
+    """ETag of the `encoding` variant of the representation tagged `etag`"""
+    if encoding == 'identity':
+        return etag
+    return f"{etag}-{ETAG_SUFFIXES[encoding]}"
+
+
+def compress_body(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+
+def init_compression(app, min_size=MIN_COMPRESS_SIZE):
+    """Compress HTML and JSON responses above `min_size` bytes for clients that accept it"""
+    available = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+    @app.after_request
+    def compress_response(response):
+        if (response.mimetype not in COMPRESSIBLE_MIMETYPES
+                or response.direct_passthrough
+                or response.is_streamed
+                or not 200 <= response.status_code < 300
+                or 'Content-Encoding' in response.headers):
+            return response
+
+        response.vary.add('Accept-Encoding')
+
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+
+        encoding = negotiate_encoding(request.accept_encodings, available)
+        if encoding == 'identity':
+            return response
+
+        response.set_data(compress_body(data, encoding))
+        response.headers['Content-Encoding'] = encoding
+
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(encoded_etag(etag, encoding))
+            # The view compared If-None-Match with the uncompressed tag
+            response.make_conditional(request)
+        return response
+
+    return compress_response
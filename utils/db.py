@@ -0,0 +1,37 @@
+import sqlite3
+import threading
+
+
+def connect(path, timeout=10, synchronous='NORMAL', **kwargs):
+    """
+    Open a SQLite database in WAL mode, so readers in other threads and
+    processes aren't blocked by a writer
+
+    Args:
+        path: Database file
+        timeout: Seconds to wait for another connection's write lock
+        synchronous: PRAGMA synchronous level
+        kwargs: Passed on to sqlite3.connect
+
+    Returns:
+        sqlite3.Connection
+    """
+    conn = sqlite3.connect(path, timeout=timeout, **kwargs)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA synchronous={synchronous}")
+    return conn
+
+
+class ThreadConnections:
+    """One lazily opened connection per thread, since sqlite3 connections can't be shared between threads"""
+
+    def __init__(self, path, **options):
+        self.path = path
+        self.options = options
+        self._local = threading.local()
+
+    def get(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = connect(self.path, **self.options)
+        return conn
@@ -0,0 +1,107 @@
+import threading
+from collections import OrderedDict
+from flask import render_template
+from markupsafe import Markup
+
+# Upper bound on memoized fragments per process (static sections included)
+FRAGMENT_CACHE_SIZE = 512
+
+# Icons shown next to each recommendation type
+FERTILIZER_ICON = 'fas fa-check-circle text-success me-2'
+IRRIGATION_ICON = 'fas fa-tint text-primary me-2'
+
+
+class FragmentCache:
+    """
+    Process-local LRU of rendered template fragments
+
+    Fragments are keyed by template name plus the inputs that fully determine
+    their output, so a cached fragment is byte-for-byte what a fresh render
+    would produce.
+    """
+
+    def __init__(self, maxsize=FRAGMENT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, template, key=None, **context):
+        cache_key = (template, key)
+        with self._lock:
+            fragment = self._entries.get(cache_key)
+            if fragment is not None:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return fragment
+
+        fragment = Markup(render_template(template, **context))
+
+        with self._lock:
+            self.misses += 1
+            self._entries[cache_key] = fragment
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return fragment
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+fragment_cache = FragmentCache()
+
+
+def render_result_fragments(results, cache=fragment_cache):
+    """
+    Render the parts of the results section that only depend on a few discrete inputs
+
+    Disease blocks have one variant per entry in RICE_DISEASES and recommendation
+    lists repeat across requests, so both are memoized by their inputs.
+
+    Returns:
+        dict: Fragment name -> Markup
+    """
+    disease = results['disease_results']['disease']
+    confidence = results['disease_results']['confidence']
+    disease_info = results['disease_info']
+    fertilizer = tuple(results['fertilizer_recommendations']['recommendations'])
+    irrigation = tuple(results['irrigation_recommendations']['recommendations'])
+
+    return {
+        'disease_summary': cache.render(
+            'partials/disease_summary.html', (disease, confidence),
+            disease=disease, disease_info=disease_info, disease_confidence=confidence),
+        'disease_notes': cache.render(
+            'partials/disease_notes.html', disease, disease_info=disease_info),
+        'disease_management': cache.render(
+            'partials/disease_management.html', disease, disease=disease, disease_info=disease_info),
+        'fertilizer_recommendations': cache.render(
+            'partials/recommendation_list.html', (FERTILIZER_ICON, fertilizer),
+            recommendations=fertilizer, icon=FERTILIZER_ICON),
+        'irrigation_recommendations': cache.render(
+            'partials/recommendation_list.html', (IRRIGATION_ICON, irrigation),
+            recommendations=irrigation, icon=IRRIGATION_ICON),
+        'previous_reports': cache.render('partials/previous_reports.html')
+    }
+
+
+def render_index(results=None, error=None, cache=fragment_cache):
+    """
+    Render index.html from cached static/memoized fragments plus the per-request numbers
+
+    Args:
+        results: Analysis results, or None for the empty form
+        error: Optional error message
+
+    Returns:
+        str: Rendered page
+    """
+    fragments = {'analysis_form': cache.render('partials/analysis_form.html')}
+    if results:
+        fragments.update(render_result_fragments(results, cache))
+
+    return render_template('index.html', results=results, error=error, fragments=fragments)
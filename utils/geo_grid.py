@@ -0,0 +1,216 @@
+import base64
+import json
+import struct
+import numpy as np
+from .predictions import (
+    predict_soil_nutrients_batch,
+    NUTRIENT_NAMES,
+    NUTRIENT_RANGES,
+    TEMPERATURE_THRESHOLDS,
+    TEMPERATURE_STATUSES
+)
+from .compact import NUTRIENT_STATUSES
+
+EARTH_RADIUS_M = 6371008.8
+
+# Default raster resolution (metres) and IDW settings
+GRID_CELL_SIZE = 10.0
+IDW_POWER = 2.0
+IDW_RADIUS_CELLS = 3
+
+# Status value of cells with no sample within the IDW radius
+NODATA = 255
+
+RASTER_LAYERS = NUTRIENT_NAMES + ['temperature']
+
+# Memory (bytes) one request's raster may take, and roughly what each cell costs: float64
+# IDW sums per layer plus the weight sum and a bincount temporary, then the uint8 raster,
+# its status-code temporaries and the encoded copy
+GRID_MEMORY_BUDGET = 64 * 1024 * 1024
+GRID_BYTES_PER_CELL = 8 * (len(RASTER_LAYERS) + 2) + 3 * len(RASTER_LAYERS)
+
+# Largest raster (rows * cols) built for one request, about 650k cells
+MAX_GRID_CELLS = GRID_MEMORY_BUDGET // GRID_BYTES_PER_CELL
+
+RASTER_MIMETYPE = 'application/vnd.agrovision.raster'
+
+
+def project_points(lat, lon):
+    """
+    Project WGS84 coordinates onto a local plane in metres
+
+    An equirectangular projection around the samples' mean latitude, which is
+    accurate to well under a cell for field-sized areas.
+
+    Returns:
+        tuple: (x, y, (lat0, lon0)) with x east and y north of (lat0, lon0)
+    """
+    lat0 = float(lat.mean())
+    lon0 = float(lon.mean())
+    scale = np.pi / 180 * EARTH_RADIUS_M
+    x = (lon - lon0) * scale * np.cos(np.radians(lat0))
+    y = (lat - lat0) * scale
+    return x, y, (lat0, lon0)
+
+
+def unproject_point(x, y, origin):
+    lat0, lon0 = origin
+    scale = np.pi / 180 * EARTH_RADIUS_M
+    return lat0 + y / scale, lon0 + x / (scale * np.cos(np.radians(lat0)))
+
+
+class GridIndex:
+    """
+    Bucket of each sample point in a regular grid
+
+    Cell centres sit at (min_x + col * cell_size, max_y - row * cell_size), so
+    row 0 is the northern edge. Every point is assigned to its nearest cell
+    centre; neighbourhood queries are then fixed (row, col) offsets.
+    """
+
+    def __init__(self, x, y, cell_size, max_cells=MAX_GRID_CELLS):
+        self.cell_size = float(cell_size)
+        self.min_x = float(x.min())
+        self.max_y = float(y.max())
+        self.cols = int(np.floor((x.max() - self.min_x) / self.cell_size + 0.5)) + 1
+        self.rows = int(np.floor((self.max_y - y.min()) / self.cell_size + 0.5)) + 1
+        if self.rows * self.cols > max_cells:
+            raise ValueError(f"Field raster would have {self.rows * self.cols} cells (max {max_cells}); "
+                             f"use a larger cell_size")
+        self.x = x
+        self.y = y
+        self.col = np.rint((x - self.min_x) / self.cell_size).astype(np.int64)
+        self.row = np.rint((self.max_y - y) / self.cell_size).astype(np.int64)
+
+    def neighbours(self, radius_cells):
+        """
+        Yield (flat cell index, distance in metres, in-bounds mask) for every
+        offset within `radius_cells` of each point's own cell
+        """
+        for dr in range(-radius_cells, radius_cells + 1):
+            for dc in range(-radius_cells, radius_cells + 1):
+                row = self.row + dr
+                col = self.col + dc
+                inside = (row >= 0) & (row < self.rows) & (col >= 0) & (col < self.cols)
+                dx = self.min_x + col * self.cell_size - self.x
+                dy = self.max_y - row * self.cell_size - self.y
+                yield row * self.cols + col, np.hypot(dx, dy), inside
+
+
+def idw_grid(index, values, power=IDW_POWER, radius_cells=IDW_RADIUS_CELLS):
+    """
+    Inverse-distance-weighted interpolation of point values onto the grid
+
+    Each point scatters its weight 1/d**power to every cell centre within
+    `radius_cells` cells (and radius_cells * cell_size metres). The (cell,
+    weight) pairs of all offsets are gathered first and summed with one
+    np.bincount per value column, so the cost is
+    O(points * (2 * radius_cells + 1)**2 + cells * k) however the points cluster.
+
+    Args:
+        index: GridIndex of the points
+        values: (points, k) array of values to interpolate
+        power: IDW distance exponent
+        radius_cells: Search radius in cells
+
+    Returns:
+        np.ndarray: (rows, cols, k) interpolated values, NaN where no point is in range
+    """
+    cells = index.rows * index.cols
+    values = values.reshape(len(values), -1)
+    radius = radius_cells * index.cell_size
+    # A point exactly on a cell centre dominates it without dividing by zero
+    min_distance = index.cell_size * 1e-3
+
+    flats, weights, points = [], [], []
+    for flat, distance, inside in index.neighbours(radius_cells):
+        use = np.flatnonzero(inside & (distance <= radius))
+        flats.append(flat[use])
+        weights.append(np.maximum(distance[use], min_distance) ** -power)
+        points.append(use)
+    flat = np.concatenate(flats)
+    weights = np.concatenate(weights)
+    points = np.concatenate(points)
+
+    weight_sum = np.bincount(flat, weights=weights, minlength=cells)
+    grid = np.empty((cells, values.shape[1]))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for k in range(values.shape[1]):
+            grid[:, k] = np.bincount(flat, weights=weights * values[points, k], minlength=cells) / weight_sum
+    return grid.reshape(index.rows, index.cols, values.shape[1])
+
+
+def nutrient_status_codes(values, name):
+    """Vectorized NUTRIENT_STATUSES index, same thresholds as format_soil_nutrients"""
+    ranges = NUTRIENT_RANGES[name]
+    codes = ((values >= ranges['low']).astype(np.uint8)
+             + (values >= ranges['optimal'])
+             + (values > ranges['high']))
+    return codes.astype(np.uint8)
+
+
+def field_status_raster(nutrient_model, lat, lon, ph_values, temperatures, cell_size=GRID_CELL_SIZE,
+                        power=IDW_POWER, radius_cells=IDW_RADIUS_CELLS, max_cells=MAX_GRID_CELLS):
+    """
+    Status-class rasters of a field from georeferenced soil samples
+
+    Nutrients are predicted once per distinct pH value, interpolated onto a
+    regular grid with IDW together with temperature, and classified with the
+    same thresholds as single analyses.
+
+    Returns:
+        tuple: (metadata dict, (layers, rows, cols) uint8 raster with NODATA gaps)
+    """
+    x, y, origin = project_points(lat, lon)
+    index = GridIndex(x, y, cell_size, max_cells)
+
+    # Predictions only depend on pH, which is usually reported to one or two decimals
+    unique_ph, inverse = np.unique(ph_values, return_inverse=True)
+    nutrients = predict_soil_nutrients_batch(nutrient_model, unique_ph)[inverse]
+
+    grid = idw_grid(index, np.column_stack([nutrients, temperatures]), power, radius_cells)
+    nodata = np.isnan(grid[:, :, 0])
+
+    raster = np.empty((len(RASTER_LAYERS), index.rows, index.cols), dtype=np.uint8)
+    for k, name in enumerate(NUTRIENT_NAMES):
+        raster[k] = nutrient_status_codes(grid[:, :, k], name)
+    raster[-1] = np.searchsorted(TEMPERATURE_THRESHOLDS, grid[:, :, -1], side='right')
+    raster[:, nodata] = NODATA
+
+    north_west = unproject_point(index.min_x, index.max_y, origin)
+    metadata = {
+        'rows': index.rows,
+        'cols': index.cols,
+        'cell_size': index.cell_size,
+        # Centre of the top-left (north-west) cell
+        'origin': {'lat': round(float(north_west[0]), 8), 'lon': round(float(north_west[1]), 8)},
+        'layers': RASTER_LAYERS,
+        'nutrient_statuses': NUTRIENT_STATUSES,
+        'temperature_statuses': TEMPERATURE_STATUSES,
+        'nodata': NODATA,
+        'samples': int(len(lat)),
+        'coverage': round(float(1 - nodata.mean()), 4)
+    }
+    return metadata, raster
+
+
+def encode_raster_binary(metadata, raster):
+    """
+    Pack a raster as: uint32 little-endian header length, JSON header, then
+    the (layers, rows, cols) uint8 cells in C order
+    """
+    header = json.dumps(metadata, separators=(',', ':')).encode('utf-8')
+    return struct.pack('<I', len(header)) + header + np.ascontiguousarray(raster, dtype=np.uint8).tobytes()
+
+
+def decode_raster_binary(data):
+    (length,) = struct.unpack_from('<I', data)
+    metadata = json.loads(data[4:4 + length])
+    raster = np.frombuffer(data, dtype=np.uint8, offset=4 + length)
+    return metadata, raster.reshape(len(metadata['layers']), metadata['rows'], metadata['cols'])
+
+
+def encode_raster_json(metadata, raster):
+    """JSON-ready raster: metadata plus base64 of the same uint8 cells"""
+    data = base64.b64encode(np.ascontiguousarray(raster, dtype=np.uint8).tobytes()).decode('ascii')
+    return dict(metadata, encoding='base64', data=data)
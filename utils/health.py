@@ -0,0 +1,115 @@
+import os
+import tempfile
+import time
+import numpy as np
+from .model_loader import get_scalers, is_dummy_model
+from .predictions import (
+    predict_soil_nutrients,
+    predict_irrigation,
+    predict_soil_nutrients_batch,
+    predict_irrigation_batch
+)
+
+# Rows in the batched warm-up calls
+WARMUP_BATCH_SIZE = 64
+
+
+def warm_up(nutrient_model, irrigation_model, batch_pool=None, batch_size=WARMUP_BATCH_SIZE):
+    """
+    Run every prediction path once so the first real request doesn't pay for
+    TensorFlow initialization, predict-function tracing or loading the scalers
+
+    Args:
+        nutrient_model: Loaded soil nutrient model
+        irrigation_model: Loaded irrigation model
+        batch_pool: BatchPool whose worker processes should be started too
+        batch_size: Rows in the batched calls
+
+    Returns:
+        dict: Seconds taken by each step and in total
+    """
+    ph_values = np.linspace(4.0, 9.0, batch_size)
+    temperatures = np.linspace(15.0, 40.0, batch_size)
+    steps = [
+        ('scalers', get_scalers),
+        ('soil_nutrients', lambda: predict_soil_nutrients(nutrient_model, 6.5)),
+        ('irrigation', lambda: predict_irrigation(irrigation_model, 28.0)),
+        ('soil_nutrients_batch', lambda: predict_soil_nutrients_batch(nutrient_model, ph_values)),
+        ('irrigation_batch', lambda: predict_irrigation_batch(irrigation_model, temperatures)),
+    ]
+    if batch_pool is not None and batch_pool.workers > 1:
+        # Each pool process loads its own models, which takes seconds
+        steps.append(('batch_pool', batch_pool.warm_up))
+
+    timings = {}
+    start = time.perf_counter()
+    for name, step in steps:
+        step_start = time.perf_counter()
+        step()
+        timings[name] = round(time.perf_counter() - step_start, 4)
+
+    return {'seconds': round(time.perf_counter() - start, 4), 'steps': timings}
+
+
+def check_writable(directory):
+    """
+    Check that files can be created in `directory`
+
+    Returns:
+        tuple: (ok, error message or None)
+    """
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=directory, prefix='.write-check-'):
+            pass
+        return True, None
+    except OSError as e:
+        return False, str(e)
+
+
+def writable_directory(*candidates):
+    """
+    Pick the first of `candidates` that files can be created in
+
+    Returns:
+        str: That directory, or the last candidate if none is writable
+    """
+    for directory in candidates:
+        if check_writable(directory)[0]:
+            return directory
+    return candidates[-1]
+
+
+def readiness_checks(nutrient_model, irrigation_model, upload_folder, warmup_report, warmup_required=True):
+    """
+    Everything a worker needs before it should receive traffic
+
+    Args:
+        warmup_report: Result of warm_up, or None if it hasn't run or failed
+        warmup_required: False when warm-up was switched off in the config, so
+            a skipped warm-up doesn't hold the worker back
+
+    Returns:
+        tuple: (ready, dict of check name -> {'ok': bool, ...})
+    """
+    models = (nutrient_model, irrigation_model)
+    if any(model is None or is_dummy_model(model) for model in models):
+        # The untrained fallback models answer every request with noise
+        checks = {'models': {'ok': False, 'error': 'Model files could not be loaded'}}
+    else:
+        checks = {'models': {'ok': True}}
+
+    try:
+        get_scalers()
+        checks['scalers'] = {'ok': True}
+    except Exception as e:
+        checks['scalers'] = {'ok': False, 'error': str(e)}
+
+    skipped = warmup_report is not None and warmup_report.get('skipped', False)
+    warmed = warmup_report is not None and not (skipped and warmup_required)
+    checks['warmup'] = {'ok': warmed, **(warmup_report or {})}
+
+    writable, error = check_writable(upload_folder)
+    checks['upload_dir'] = {'ok': writable, 'error': error} if error else {'ok': writable}
+
+    return all(check['ok'] for check in checks.values()), checks
@@ -0,0 +1,179 @@
+import numpy as np
+from .predictions import (
+    predict_irrigation_batch,
+    water_need_factor,
+    TOTAL_WATER_NEED,
+    MIN_IRRIGATION_EFFICIENCY,
+    RAINFALL_THRESHOLDS,
+    IRRIGATION_STATUSES,
+    IRRIGATION_SCHEDULES,
+    TEMPERATURE_THRESHOLDS,
+    TEMPERATURE_STATUSES
+)
+
+# Upper bound on field-season days evaluated in a single plan, counting the
+# padding of shorter seasons up to the longest one
+MAX_PLAN_DAYS = 2_000_000
+
+# Longest growing season accepted in a plan
+MAX_SEASON_DAYS = 366
+
+# Temperature statuses that call for more frequent irrigation
+HEAT_STRESS_STATUSES = ('hot', 'extreme')
+
+
+def temperatures_to_matrix(seasons):
+    """
+    Pad per-season daily temperature lists into one (seasons, days) matrix
+
+    Args:
+        seasons: List of daily temperature lists, possibly of different lengths
+
+    Returns:
+        np.ndarray: float64 matrix, NaN after the end of shorter seasons
+
+    Raises:
+        ValueError: If a season is longer than MAX_SEASON_DAYS or the padded
+            matrix would exceed MAX_PLAN_DAYS cells
+    """
+    longest = max((len(season) for season in seasons), default=0)
+    if longest > MAX_SEASON_DAYS:
+        raise ValueError(f"A season can have at most {MAX_SEASON_DAYS} days")
+    if len(seasons) * longest > MAX_PLAN_DAYS:
+        raise ValueError(f"Too many days in one plan (max {MAX_PLAN_DAYS})")
+    matrix = np.full((len(seasons), longest), np.nan, dtype=np.float64)
+    for i, season in enumerate(seasons):
+        matrix[i, :len(season)] = [np.nan if t is None else t for t in season]
+    return matrix
+
+
+def plan_irrigation(model, temperatures):
+    """
+    Evaluate the irrigation model across every day of many growing seasons
+
+    Each day's temperature goes through the same model and rules as
+    predict_irrigation, in a single batched model call. The seasonal water need
+    and predicted rainfall are spread evenly across the days of the season, so
+    the cumulative columns add up to a season-level budget.
+
+    Args:
+        model: Loaded Keras model
+        temperatures: (seasons, days) matrix of daily temperatures in Celsius;
+            NaN marks days beyond the end of a season
+
+    Returns:
+        dict: Daily (seasons, days) arrays and per-season totals
+    """
+    temperatures = np.asarray(temperatures, dtype=np.float64)
+    if temperatures.ndim == 1:
+        temperatures = temperatures[np.newaxis, :]
+
+    valid = np.isfinite(temperatures)
+    season_days = valid.sum(axis=1)
+
+    # One model call for every valid day of every season
+    rainfall = np.zeros(temperatures.shape)
+    efficiency = np.ones(temperatures.shape)
+    if valid.any():
+        rainfall[valid], efficiency[valid] = predict_irrigation_batch(model, temperatures[valid])
+
+    clipped = np.clip(np.where(valid, temperatures, 25.0), 10, 40)
+    days = np.maximum(season_days, 1)[:, np.newaxis]
+
+    # Spread the season-level need and rainfall over the days of the season
+    daily_need = np.where(valid, TOTAL_WATER_NEED * water_need_factor(clipped) / days, 0.0)
+    daily_rainfall = np.where(valid, rainfall / days, 0.0)
+    daily_required = np.maximum(0.0, daily_need - daily_rainfall)
+    daily_applied = daily_required / np.maximum(efficiency, MIN_IRRIGATION_EFFICIENCY)
+
+    # Same thresholds as get_irrigation_recommendations / get_temperature_status
+    irrigation_status = np.searchsorted(RAINFALL_THRESHOLDS, rainfall, side='right')
+    temperature_status = np.searchsorted(TEMPERATURE_THRESHOLDS, clipped, side='right')
+    irrigation_status[~valid] = -1
+    temperature_status[~valid] = -1
+
+    heat_codes = [TEMPERATURE_STATUSES.index(status) for status in HEAT_STRESS_STATUSES]
+
+    # Season rainfall is the mean of the daily season-scale predictions
+    season_rainfall = daily_rainfall.sum(axis=1)
+
+    return {
+        'valid': valid,
+        'season_days': season_days,
+        'temperature': temperatures,
+        'rainfall': daily_rainfall,
+        'water_efficiency': np.where(valid, efficiency, np.nan),
+        'water_need': daily_need,
+        'irrigation_required': daily_required,
+        'irrigation_applied': daily_applied,
+        'cumulative_water_need': daily_need.cumsum(axis=1),
+        'cumulative_rainfall': daily_rainfall.cumsum(axis=1),
+        'cumulative_irrigation_applied': daily_applied.cumsum(axis=1),
+        'irrigation_status': irrigation_status,
+        'temperature_status': temperature_status,
+        'totals': {
+            'water_need': daily_need.sum(axis=1),
+            'rainfall': season_rainfall,
+            'irrigation_required': daily_required.sum(axis=1),
+            'irrigation_applied': daily_applied.sum(axis=1),
+            'irrigation_status': np.searchsorted(RAINFALL_THRESHOLDS, season_rainfall, side='right'),
+            'heat_stress_days': np.isin(temperature_status, heat_codes).sum(axis=1)
+        }
+    }
+
+
+def summarize_plan(plan, season_ids=None, include_schedule=True, decimals=2):
+    """
+    Convert the arrays returned by plan_irrigation into a JSON-ready dict
+
+    Status values in the per-day schedule are indexes into the `irrigation_statuses`
+    and `temperature_statuses` lists so the schedule text is only sent once.
+
+    Args:
+        plan: Output of plan_irrigation
+        season_ids: Optional identifier for each season
+        include_schedule: Whether to include the day-by-day columns
+        decimals: Rounding applied to water amounts
+
+    Returns:
+        dict: Season budgets and optional schedules
+    """
+    totals = plan['totals']
+    season_count = len(plan['season_days'])
+    if season_ids is None:
+        season_ids = list(range(season_count))
+
+    seasons = []
+    for i in range(season_count):
+        days = int(plan['season_days'][i])
+        season = {
+            'id': season_ids[i],
+            'days': days,
+            'total_water_need': round(float(totals['water_need'][i]), decimals),
+            'rainfall': round(float(totals['rainfall'][i]), decimals),
+            'irrigation_required': round(float(totals['irrigation_required'][i]), decimals),
+            'irrigation_applied': round(float(totals['irrigation_applied'][i]), decimals),
+            'irrigation_status': IRRIGATION_STATUSES[int(totals['irrigation_status'][i])],
+            'heat_stress_days': int(totals['heat_stress_days'][i])
+        }
+
+        if include_schedule:
+            season['schedule'] = {
+                'irrigation_status': plan['irrigation_status'][i, :days].tolist(),
+                'temperature_status': plan['temperature_status'][i, :days].tolist(),
+                'irrigation_required': np.round(plan['irrigation_required'][i, :days], decimals).tolist(),
+                'irrigation_applied': np.round(plan['irrigation_applied'][i, :days], decimals).tolist(),
+                'cumulative_water_need': np.round(plan['cumulative_water_need'][i, :days], decimals).tolist(),
+                'cumulative_rainfall': np.round(plan['cumulative_rainfall'][i, :days], decimals).tolist(),
+                'cumulative_irrigation_applied': np.round(
+                    plan['cumulative_irrigation_applied'][i, :days], decimals).tolist()
+            }
+
+        seasons.append(season)
+
+    return {
+        'irrigation_statuses': IRRIGATION_STATUSES,
+        'temperature_statuses': TEMPERATURE_STATUSES,
+        'schedules': IRRIGATION_SCHEDULES,
+        'seasons': seasons
+    }
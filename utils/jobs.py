@@ -0,0 +1,281 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from .analysis import analyze_batch
+from .compact import compact_results
+from .db import ThreadConnections, connect
+from .parallel import model_pool, worker_models
+from .serialization import dumps, loads
+
+JOB_KINDS = ('single', 'batch', 'images')
+
+# Seconds between progress writes while a job runs
+PROGRESS_INTERVAL = 0.5
+
+# A job still 'running' this long after it started is assumed orphaned and requeued
+JOB_STALE_SECONDS = 60 * 60
+
+# Seconds the dispatcher sleeps when the queue is empty
+POLL_INTERVAL = 0.2
+
+# Samples analyzed per batched model call; progress is reported between chunks
+JOB_CHUNK_SIZE = 256
+
+
+def job_samples(kind, payload):
+    """
+    List the (ph, temperature, image_path) samples a job will analyze
+
+    Args:
+        kind: One of JOB_KINDS
+        payload: Job payload as submitted
+
+    Returns:
+        list: Sample tuples
+    """
+    if kind == 'single':
+        return [(float(payload['ph']), float(payload['temperature']), None)]
+
+    if kind == 'images':
+        ph_value = float(payload.get('ph', 7.0))
+        temperature = float(payload.get('temperature', 25.0))
+        image_paths = payload['image_paths']
+        if not isinstance(image_paths, list) or not all(isinstance(path, str) for path in image_paths):
+            raise ValueError("image_paths must be a list of strings")
+        return [(ph_value, temperature, image_path) for image_path in image_paths]
+
+    # Batch: either columns ({"ph": [...], "temperature": [...]}) or rows ({"samples": [...]})
+    if 'samples' in payload:
+        return [(float(s['ph']), float(s['temperature']), None) for s in payload['samples']]
+    ph_values, temperatures = payload['ph'], payload['temperature']
+    if len(ph_values) != len(temperatures):
+        raise ValueError("ph and temperature must have the same length")
+    return [(float(p), float(t), None) for p, t in zip(ph_values, temperatures)]
+
+
+def execute_job(samples, models, report=None):
+    """
+    Analyze every sample of a job
+
+    Args:
+        samples: Output of job_samples
+        models: (nutrient_model, irrigation_model)
+        report: Optional callable receiving the number of samples done
+
+    Returns:
+        list: Compact results, one per sample
+    """
+    nutrient_model, irrigation_model = models
+    results = []
+    for start in range(0, len(samples), JOB_CHUNK_SIZE):
+        ph_values, temperatures, image_paths = zip(*samples[start:start + JOB_CHUNK_SIZE])
+        chunk = analyze_batch(nutrient_model, irrigation_model, ph_values, temperatures, list(image_paths))
+        results.extend(compact_results(analysis) for analysis in chunk)
+        if report is not None:
+            report(len(results))
+    return results
+
+
+# Seconds a connection waits for another writer's lock
+JOB_DB_TIMEOUT = 30
+
+
+def _connect(path):
+    return connect(path, timeout=JOB_DB_TIMEOUT)
+
+
+def _run_job(path, job_id, models=None):
+    """Run one claimed job and record its progress and outcome in the queue database"""
+    conn = _connect(path)
+    try:
+        kind, payload = conn.execute("SELECT kind, payload FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        last_write = [0.0]
+
+        def report(done):
+            now = time.time()
+            if now - last_write[0] >= PROGRESS_INTERVAL:
+                with conn:
+                    conn.execute("UPDATE jobs SET progress = ? WHERE id = ?", (done, job_id))
+                last_write[0] = now
+
+        try:
+            samples = job_samples(kind, loads(payload))
+            results = execute_job(samples, models or worker_models(), report)
+        except Exception as e:
+            with conn:
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                    (f"{type(e).__name__}: {e}", time.time(), job_id)
+                )
+            return
+
+        with conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'done', progress = total, result = ?, finished_at = ? WHERE id = ?",
+                (dumps(results), time.time(), job_id)
+            )
+    finally:
+        conn.close()
+
+
+class JobQueue:
+    """
+    Persistent queue of analysis jobs executed in a local process pool
+
+    Jobs are rows in a SQLite database, so they survive restarts and can be
+    submitted and polled from any worker. Each process that owns a JobQueue
+    runs a dispatcher thread that claims queued jobs and hands them to a pool
+    of `workers` processes (each loading the models once). With `workers=0`
+    (the default) jobs run in the dispatcher thread using `models`, so
+    importing the app never spawns processes.
+    """
+
+    def __init__(self, path, workers=0, models=None):
+        self.path = path
+        self.workers = workers
+        self.models = models
+        self._connections = ThreadConnections(path, timeout=JOB_DB_TIMEOUT)
+        self._pool = None
+        self._dispatcher = None
+        self._slots = threading.Semaphore(max(workers, 1))
+        self._start_lock = threading.Lock()
+        self._stopping = threading.Event()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connections.get() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " kind TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " payload BLOB NOT NULL,"
+                " progress INTEGER NOT NULL DEFAULT 0,"
+                " total INTEGER NOT NULL,"
+                " result BLOB,"
+                " error TEXT,"
+                " created_at REAL NOT NULL,"
+                " started_at REAL,"
+                " finished_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_queued ON jobs (status, created_at)")
+
+    def submit(self, kind, payload):
+        """
+        Queue a job
+
+        Args:
+            kind: One of JOB_KINDS
+            payload: JSON-serializable job input
+
+        Returns:
+            str: Job ID
+        """
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        # Reject malformed payloads now rather than failing in the worker
+        total = len(job_samples(kind, payload))
+
+        job_id = uuid.uuid4().hex
+        with self._connections.get() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, status, payload, total, created_at) VALUES (?, ?, 'queued', ?, ?, ?)",
+                (job_id, kind, dumps(payload), total, time.time())
+            )
+        self.start()
+        return job_id
+
+    def status(self, job_id):
+        """Job state and progress, or None for an unknown job"""
+        with self._connections.get() as conn:
+            row = conn.execute(
+                "SELECT id, kind, status, progress, total, error, created_at, started_at, finished_at"
+                " FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ('id', 'kind', 'status', 'progress', 'total', 'error', 'created_at', 'started_at', 'finished_at')
+        return dict(zip(keys, row))
+
+    def result(self, job_id):
+        """Results of a finished job, or None if it isn't done"""
+        with self._connections.get() as conn:
+            row = conn.execute("SELECT result FROM jobs WHERE id = ? AND status = 'done'", (job_id,)).fetchone()
+        return loads(row[0]) if row else None
+
+    def start(self):
+        """Start the dispatcher (and process pool) on first use"""
+        with self._start_lock:
+            if self._dispatcher is not None:
+                return
+            if self.workers > 0:
+                self._pool = model_pool(self.workers)
+            self._requeue_stale()
+            self._dispatcher = threading.Thread(target=self._dispatch, name='job-dispatcher', daemon=True)
+            self._dispatcher.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._dispatcher is not None:
+            self._dispatcher.join()
+        if self._pool is not None:
+            self._pool.shutdown()
+
+    def _requeue_stale(self):
+        with self._connections.get() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', progress = 0 WHERE status = 'running' AND started_at < ?",
+                (time.time() - JOB_STALE_SECONDS,)
+            )
+
+    def _claim(self):
+        """Atomically move the oldest queued job to running; safe across processes"""
+        conn = self._connections.get()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                conn.execute("UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?", (time.time(), row[0]))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return row[0] if row else None
+
+    def _dispatch(self):
+        while not self._stopping.is_set():
+            self._slots.acquire()
+            try:
+                job_id = self._claim()
+            except sqlite3.Error as e:
+                print(f"Error claiming job: {e}")
+                job_id = None
+
+            if job_id is None:
+                self._slots.release()
+                self._stopping.wait(POLL_INTERVAL)
+                continue
+
+            if self._pool is None:
+                try:
+                    _run_job(self.path, job_id, self.models)
+                finally:
+                    self._slots.release()
+            else:
+                future = self._pool.submit(_run_job, self.path, job_id)
+                future.add_done_callback(lambda done, job_id=job_id: self._finished(job_id, done))
+
+    def _finished(self, job_id, future):
+        self._slots.release()
+        error = future.exception()
+        if error is None:
+            return
+        # The worker process died before it could record the failure itself
+        with self._connections.get() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ? AND status = 'running'",
+                (f"{type(error).__name__}: {error}", time.time(), job_id)
+            )
@@ -4,6 +4,12 @@ from tensorflow.keras.models import load_model
 import joblib
 import numpy as np
 
+# Scalers loaded (or built) by the first get_scalers call
+_scalers = None
+
+# Name prefix of the stand-in models built when the real ones can't be loaded
+DUMMY_MODEL_PREFIX = 'dummy_'
+
 
 def load_models():
     """
@@ -49,7 +55,7 @@ def create_dummy_nutrient_model():
     inputs = tf.keras.Input(shape=(1,))
     x = tf.keras.layers.Dense(10, activation='relu')(inputs)
     outputs = tf.keras.layers.Dense(7, activation='linear')(x)  # OM, EC, N, P, K, etc.
-    model = tf.keras.Model(inputs=inputs, outputs=outputs)
+    model = tf.keras.Model(inputs=inputs, outputs=outputs, name=f'{DUMMY_MODEL_PREFIX}nutrient_model')
     model.compile(optimizer='adam', loss='mse')
     return model
 
@@ -59,16 +65,30 @@ def create_dummy_irrigation_model():
     inputs = tf.keras.Input(shape=(1,))
     x = tf.keras.layers.Dense(10, activation='relu')(inputs)
     outputs = tf.keras.layers.Dense(2, activation='linear')(x)  # rainfall and water usage efficiency
-    model = tf.keras.Model(inputs=inputs, outputs=outputs)
+    model = tf.keras.Model(inputs=inputs, outputs=outputs, name=f'{DUMMY_MODEL_PREFIX}irrigation_model')
     model.compile(optimizer='adam', loss='mse')
     return model
 
 
+def is_dummy_model(model):
+    """Whether `model` is a stand-in from create_dummy_*_model rather than a loaded model"""
+    return getattr(model, 'name', '').startswith(DUMMY_MODEL_PREFIX)
+
+
 def get_scalers():
     """
     Try to load the model scalers for input/output normalization
     Returns default scalers if files don't exist
+
+    The scalers are loaded once per process; every prediction shares them.
     """
+    global _scalers
+    if _scalers is None:
+        _scalers = _load_scalers()
+    return _scalers
+
+
+def _load_scalers():
     try:
         # Load scalers if they exist
         X_scaler = joblib.load(os.path.join('models', 'X_scaler.pkl'))
@@ -0,0 +1,150 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from .analysis import analyze_batch
+from .compact import compact_results
+
+# Models loaded once per pool process by _init_worker
+_worker_models = None
+
+# Seconds start_workers waits for every worker process to come up
+WORKER_START_TIMEOUT = 300
+
+
+def _init_worker():
+    """Pool initializer: load the models once per worker process"""
+    global _worker_models
+    from .model_loader import load_models
+    _worker_models = load_models()
+
+
+def worker_models():
+    """(nutrient_model, irrigation_model) of the current model_pool process"""
+    return _worker_models
+
+
+def model_pool(workers):
+    """
+    Process pool whose workers each load the models once, at start-up
+
+    Used by BatchPool and the job queue. Workers are started with spawn rather
+    than fork because TensorFlow isn't fork-safe once initialized.
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker
+    )
+
+
+def start_workers(pool, workers):
+    """
+    Start the pool's worker processes (and load their models) ahead of the first task
+
+    Each of the `workers` tasks blocks on a shared barrier, so one process
+    can't run several of them: they only return once `workers` distinct
+    processes, each past its initializer, are running one.
+
+    Returns:
+        set: PIDs of the worker processes
+    """
+    with multiprocessing.get_context('spawn').Manager() as manager:
+        barrier = manager.Barrier(workers, timeout=WORKER_START_TIMEOUT)
+        return set(pool.map(_wait_for_workers, [barrier] * workers))
+
+
+def _analyze_shard(name, rows, start, end):
+    """Analyze rows [start, end) of the shared (2, rows) pH/temperature array"""
+    # Pool processes share the parent's resource tracker, so attaching here
+    # doesn't make the block's lifetime depend on the worker
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        inputs = np.ndarray((2, rows), dtype=np.float64, buffer=block.buf)
+        # Copy the shard out so nothing references the buffer once it is closed
+        ph_values = inputs[0, start:end].copy()
+        temperatures = inputs[1, start:end].copy()
+    finally:
+        block.close()
+
+    nutrient_model, irrigation_model = worker_models()
+    return [compact_results(analysis)
+            for analysis in analyze_batch(nutrient_model, irrigation_model, ph_values, temperatures)]
+
+
+class BatchPool:
+    """
+    Process pool for CPU-bound batch analysis
+
+    Inputs are written once into a shared memory block and each worker reads
+    its own contiguous shard from it, so only the shard bounds are pickled on
+    the way in. Every worker process loads the models once, at start-up.
+    """
+
+    def __init__(self, workers=None):
+        # 0 or 1 workers: callers analyze in-process and never start the pool
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = model_pool(self.workers)
+            return self._pool
+
+    def warm_up(self):
+        """Start every worker process and load its models"""
+        start_workers(self._executor(), self.workers)
+
+    def analyze(self, ph_values, temperatures, shards=None):
+        """
+        Analyze a batch across the pool
+
+        Args:
+            ph_values: Sequence of soil pH values
+            temperatures: Sequence of temperatures in Celsius
+            shards: Number of shards (defaults to one per worker)
+
+        Returns:
+            list: Compact results in input order
+        """
+        ph_values = np.asarray(ph_values, dtype=np.float64).reshape(-1)
+        temperatures = np.asarray(temperatures, dtype=np.float64).reshape(-1)
+        rows = len(ph_values)
+        if rows == 0:
+            return []
+
+        pool = self._executor()
+        shards = max(1, min(shards or self.workers, rows))
+        bounds = np.linspace(0, rows, shards + 1).astype(int)
+
+        block = shared_memory.SharedMemory(create=True, size=2 * rows * np.dtype(np.float64).itemsize)
+        try:
+            inputs = np.ndarray((2, rows), dtype=np.float64, buffer=block.buf)
+            inputs[0] = ph_values
+            inputs[1] = temperatures
+            del inputs
+
+            futures = [pool.submit(_analyze_shard, block.name, rows, int(start), int(end))
+                       for start, end in zip(bounds[:-1], bounds[1:])]
+            results = []
+            for future in futures:
+                results.extend(future.result())
+            return results
+        finally:
+            block.close()
+            block.unlink()
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+
+def _wait_for_workers(barrier):
+    barrier.wait()
+    return os.getpid()
@@ -5,6 +5,55 @@ from .model_loader import get_scalers
 NUTRIENT_NAMES = ['OM', 'EC', 'N', 'P', 'K', 'Mg', 'Fe']
 NUTRIENT_UNITS = ['%', 'dS/m', 'mg/kg', 'mg/kg', 'mg/kg', 'mg/kg', 'mg/kg']
 
+# Average water need (mm) for a rice growing season
+TOTAL_WATER_NEED = 1200
+
+# Below this efficiency, irrigation is sized as if efficiency were this value
+MIN_IRRIGATION_EFFICIENCY = 0.5
+
+# Rainfall (mm) upper bounds for each irrigation status, from wettest need to driest
+RAINFALL_THRESHOLDS = [100, 200, 300, 400]
+IRRIGATION_STATUSES = ['high', 'medium', 'moderate', 'low', 'minimal']
+
+# Temperature (C) upper bounds for each status returned by get_temperature_status
+TEMPERATURE_THRESHOLDS = [20, 25, 30, 35]
+TEMPERATURE_STATUSES = ['cold', 'cool', 'optimal', 'hot', 'extreme']
+
+# Label and description shown for each temperature status
+TEMPERATURE_DESCRIPTIONS = {
+    'cold': ('Cold', 'Below optimal - growth may be inhibited'),
+    'cool': ('Moderate', 'Acceptable for most rice varieties'),
+    'optimal': ('Optimal', 'Ideal range for rice growth'),
+    'hot': ('High', 'Watch for heat stress'),
+    'extreme': ('Extreme', 'High risk of heat damage')
+}
+
+IRRIGATION_SCHEDULES = {
+    'high': "Maintain 5-7cm standing water throughout the growing season. Irrigate every 3-4 days.",
+    'medium': "Maintain 3-5cm standing water. Implement Alternate Wetting and Drying with 7-day cycles.",
+    'moderate': "Use Alternate Wetting and Drying with 10-day cycles. Ensure soil is moist during critical stages.",
+    'low': "Supplement only during dry spells. Focus on maintaining moist soil during critical growth stages.",
+    'minimal': "Focus on drainage rather than irrigation. Monitor for waterlogging."
+}
+
+# Irrigation advice per recommendation code
+IRRIGATION_MESSAGES = {
+    'cold_planting': "Consider delaying planting or using cold-tolerant varieties.",
+    'heat_stress': "Increase irrigation frequency to reduce heat stress.",
+    'rainfall_high': "Implement full irrigation system. Maintain 5-7cm standing water in paddies.",
+    'rainfall_medium': "Supplement with irrigation. Ensure field is flooded during critical stages.",
+    'rainfall_moderate': "Implement moderate irrigation. Monitor water levels regularly.",
+    'rainfall_low': "Minimal irrigation needed. Focus on drainage during heavy rainfall.",
+    'rainfall_minimal': "Focus on drainage and flood prevention. No additional irrigation required.",
+    'efficiency_poor': "Improve irrigation infrastructure. Consider laser land leveling for even water distribution.",
+    'efficiency_fair': "Implement water conservation practices such as alternate wetting and drying (AWD).",
+    **{f'schedule_{status}': f"Irrigation Schedule: {schedule}" for status, schedule in IRRIGATION_SCHEDULES.items()},
+    'conservation': "Water Conservation: Implement water-saving technologies such as drip irrigation or moisture sensors."
+}
+
+# Rows per model.predict call for batched inference
+PREDICT_BATCH_SIZE = 4096
+
 # Define optimal ranges for rice
 NUTRIENT_RANGES = {
     'OM': {'low': 1.5, 'optimal': 3.0, 'high': 5.0},
@@ -17,59 +66,106 @@ NUTRIENT_RANGES = {
 }
 
 
-def predict_soil_nutrients(model, ph_value):
+# Fertilizer advice per recommendation code ({nutrient}_{status}); {ph} is filled in from the soil reading
+FERTILIZER_MESSAGES = {
+    'N_deficient': "Nitrogen is deficient. Apply nitrogen fertilizer (urea or ammonium sulfate) at 100-120 kg/ha.",
+    'P_deficient': "Phosphorus is deficient. Apply phosphate fertilizer (DAP or SSP) at 60-80 kg/ha.",
+    'K_deficient': "Potassium is deficient. Apply potassium fertilizer (KCl or K2SO4) at 60-80 kg/ha.",
+    'OM_deficient': "Organic Matter is low. Add compost or well-rotted manure at 5-10 tons/ha.",
+    **{f'{name}_deficient': f"{name} is deficient. Consider applying appropriate supplements."
+       for name in NUTRIENT_NAMES if name not in ('N', 'P', 'K', 'OM')},
+    **{f'{name}_low': f"{name} is somewhat low. Apply moderate amounts of fertilizer." for name in ('N', 'P', 'K')},
+    **{f'{name}_excessive': f"{name} is excessive. Reduce or avoid further application." for name in ('N', 'P', 'K')},
+    'ph_acidic': "Soil is acidic (pH {ph}). Consider applying agricultural lime to raise pH.",
+    'ph_alkaline': "Soil is alkaline (pH {ph}). For rice, consider acidifying amendments if available.",
+    'ph_good': "Soil pH ({ph}) is in good range for rice cultivation.",
+    'balanced_npk': ("Apply balanced NPK fertilizer in split doses - 50% at planting, "
+                     "25% during tillering, and 25% at panicle initiation.")
+}
+
+
+def predict_soil_nutrients_batch(model, ph_values):
     """
-    Predict soil nutrient concentrations based on pH value
+    Predict soil nutrient concentrations for many pH values at once
 
     Args:
         model: Loaded Keras model
-        ph_value: Soil pH value
+        ph_values: Sequence of soil pH values
 
     Returns:
-        dict: Predicted nutrient values with status
+        np.ndarray: (len(ph_values), len(NUTRIENT_NAMES)) predicted nutrient values
     """
     # Get scalers for input/output normalization
     X_scaler, y_scaler = get_scalers()
 
+    ph_values = np.asarray(ph_values, dtype=np.float64).reshape(-1)
+
     # Preprocess input
-    ph_scaled = X_scaler.transform([[ph_value]])
+    ph_scaled = X_scaler.transform(ph_values.reshape(-1, 1))
 
     try:
-        # Make prediction
-        predictions_scaled = model.predict(ph_scaled)
+        # Make prediction for the whole batch in one call
+        predictions_scaled = model.predict(ph_scaled, batch_size=PREDICT_BATCH_SIZE, verbose=0)
 
         # Check output shape to determine which model we're using
         output_shape = predictions_scaled.shape[1]
 
         # Initialize a zeros array with the expected full output size
         # (our y_scaler is fit to handle both model types)
-        full_output = np.zeros((1, 9))  # Larger than either model needs
+        full_output = np.zeros((len(ph_values), 9))  # Larger than either model needs
 
         if output_shape == 2:
             # This is the irrigation model being used for nutrients
             print("Warning: Using irrigation model for nutrient prediction. Using placeholder values.")
             # Generate reasonable placeholder nutrient values based on pH
-            nutrients = generate_placeholder_nutrients(ph_value)
-            # Fill output array starting at index 2 (after irrigation positions)
-            full_output[0, 2:2 + len(nutrients)] = nutrients
+            nutrients = generate_placeholder_nutrients_batch(ph_values)
+            # Fill output array starting at column 2 (after irrigation positions)
+            full_output[:, 2:2 + nutrients.shape[1]] = nutrients
         else:
             # This is the nutrient model with correct shape
             # Fill output array with actual prediction values
-            # Start at index 2 since we assume first two positions are for irrigation
+            # Start at column 2 since we assume first two positions are for irrigation
             # (If output shape is smaller than 7, we'll just use what we have)
             max_nutrients = min(output_shape, len(NUTRIENT_NAMES))
-            full_output[0, 2:2 + max_nutrients] = predictions_scaled[0, :max_nutrients]
+            full_output[:, 2:2 + max_nutrients] = predictions_scaled[:, :max_nutrients]
 
         # Inverse transform to get actual values
-        all_predictions = y_scaler.inverse_transform(full_output)[0]
+        all_predictions = y_scaler.inverse_transform(full_output)
 
         # Extract just the nutrient values (skip irrigation values)
-        predictions = all_predictions[2:2 + len(NUTRIENT_NAMES)]
+        return all_predictions[:, 2:2 + len(NUTRIENT_NAMES)]
     except Exception as e:
         print(f"Error making prediction: {e}")
         # Fallback to generated values
-        predictions = generate_placeholder_nutrients(ph_value)
+        return generate_placeholder_nutrients_batch(ph_values)
+
+
+def predict_soil_nutrients(model, ph_value):
+    """
+    Predict soil nutrient concentrations based on pH value
+
+    Args:
+        model: Loaded Keras model
+        ph_value: Soil pH value
 
+    Returns:
+        dict: Predicted nutrient values with status
+    """
+    predictions = predict_soil_nutrients_batch(model, [ph_value])[0]
+    return format_soil_nutrients(ph_value, predictions)
+
+
+def format_soil_nutrients(ph_value, predictions):
+    """
+    Attach units and status to predicted nutrient values
+
+    Args:
+        ph_value: Soil pH value
+        predictions: Nutrient values in NUTRIENT_NAMES order
+
+    Returns:
+        dict: Predicted nutrient values with status
+    """
     # Format results
     results = []
     for i, nutrient in enumerate(NUTRIENT_NAMES):
@@ -136,84 +232,124 @@ def generate_placeholder_nutrients(ph_value):
     return np.array([om, ec, n, p, k, mg, fe])
 
 
-def predict_irrigation(model, temperature):
+def generate_placeholder_nutrients_batch(ph_values):
+    """Vectorized generate_placeholder_nutrients: one row of nutrient values per pH"""
+    ph_values = np.asarray(ph_values, dtype=np.float64).reshape(-1)
+    values = np.tile(generate_placeholder_nutrients(7.0), (len(ph_values), 1))
+
+    # Same pH adjustments as generate_placeholder_nutrients, columns ordered as NUTRIENT_NAMES
+    acidic = ph_values < 5.5
+    alkaline = ph_values > 7.5
+    values[acidic] *= [1.0, 1.0, 1.0, 0.8, 0.9, 0.8, 1.3]
+    values[alkaline] *= [1.0, 1.0, 1.0, 1.1, 1.1, 1.2, 0.7]
+    return values
+
+
+def predict_irrigation_batch(model, temperatures):
     """
-    Predict rainfall and water usage efficiency based on temperature
+    Predict rainfall and water usage efficiency for many temperatures at once
 
     Args:
         model: Loaded Keras model
-        temperature: Temperature value in Celsius
+        temperatures: Sequence of temperature values in Celsius
 
     Returns:
-        dict: Predicted rainfall and water usage efficiency
+        tuple: (rainfall, water_efficiency) arrays, one value per temperature
     """
     # Get scalers for input/output normalization
     X_scaler, y_scaler = get_scalers()
 
-    # Ensure temperature is within a reasonable range
-    temperature = max(10, min(40, temperature))
+    # Ensure temperatures are within a reasonable range
+    temperatures = np.clip(np.asarray(temperatures, dtype=np.float64).reshape(-1), 10, 40)
 
     # Preprocess input
-    temp_scaled = X_scaler.transform([[temperature]])
+    temp_scaled = X_scaler.transform(temperatures.reshape(-1, 1))
 
     try:
-        # Make prediction
-        predictions_scaled = model.predict(temp_scaled)
+        # Make prediction for the whole batch in one call
+        predictions_scaled = model.predict(temp_scaled, batch_size=PREDICT_BATCH_SIZE, verbose=0)
 
         # Check output shape to determine which model we're using
         output_shape = predictions_scaled.shape[1]
 
         # Initialize a zeros array with the expected full output size
         # (our y_scaler is fit to handle both model types)
-        full_output = np.zeros((1, 9))  # Larger than either model needs
+        full_output = np.zeros((len(temperatures), 9))  # Larger than either model needs
 
-        if output_shape < 3:
-            # This is the irrigation model with correct shape (2 outputs)
-            # Fill first two positions directly
-            full_output[0, :2] = predictions_scaled[0, :2]
-        else:
+        if output_shape >= 3:
             # This is the nutrient model being used for irrigation
             print("Warning: Using nutrient model for irrigation prediction. Using first two outputs.")
-            # Use first two outputs (may not be meaningful)
-            full_output[0, :2] = predictions_scaled[0, :2]
 
-        # Inverse transform to get actual values
-        all_predictions = y_scaler.inverse_transform(full_output)[0]
+        # Use first two outputs (may not be meaningful for the nutrient model)
+        full_output[:, :2] = predictions_scaled[:, :2]
 
-        # Extract just the irrigation values (first two values)
-        rainfall = float(all_predictions[0])
-        water_efficiency = float(all_predictions[1])
+        # Inverse transform to get actual values
+        all_predictions = y_scaler.inverse_transform(full_output)
 
-        # Ensure values are in reasonable ranges
-        rainfall = max(50, min(500, rainfall))
-        water_efficiency = max(0.2, min(0.95, water_efficiency))
+        # Extract just the irrigation values (first two columns)
+        rainfall = all_predictions[:, 0]
+        water_efficiency = all_predictions[:, 1]
     except Exception as e:
         print(f"Error making prediction: {e}")
         # Generate reasonable values based on temperature
-        rainfall = 100 + (25 - temperature) * 10  # More rain at lower temps
-        water_efficiency = 0.4 + (temperature - 15) * 0.02  # Better efficiency at higher temps
+        rainfall = 100 + (25 - temperatures) * 10  # More rain at lower temps
+        water_efficiency = 0.4 + (temperatures - 15) * 0.02  # Better efficiency at higher temps
+
+    # Keep within reasonable ranges
+    rainfall = np.clip(rainfall, 50, 500)
+    water_efficiency = np.clip(water_efficiency, 0.2, 0.95)
+
+    return rainfall, water_efficiency
+
+
+def water_need_factor(temperatures):
+    """Seasonal water need multiplier for each temperature (less when cool, more when hot)"""
+    temperatures = np.asarray(temperatures, dtype=np.float64)
+    return np.select([temperatures < 22, temperatures > 30], [0.9, 1.15], default=1.0)
+
+
+def predict_irrigation(model, temperature):
+    """
+    Predict rainfall and water usage efficiency based on temperature
+
+    Args:
+        model: Loaded Keras model
+        temperature: Temperature value in Celsius
+
+    Returns:
+        dict: Predicted rainfall and water usage efficiency
+    """
+    # Ensure temperature is within a reasonable range
+    temperature = max(10, min(40, temperature))
 
-        # Keep within reasonable ranges
-        rainfall = max(50, min(500, rainfall))
-        water_efficiency = max(0.2, min(0.95, water_efficiency))
+    rainfall, water_efficiency = predict_irrigation_batch(model, [temperature])
+    return format_irrigation(temperature, rainfall[0], water_efficiency[0])
 
-    # Calculate irrigation requirement (simplified)
-    total_water_need = 1200  # Average for rice growing season
+
+def format_irrigation(temperature, rainfall, water_efficiency):
+    """
+    Derive water requirements from predicted rainfall and water usage efficiency
+
+    Args:
+        temperature: Temperature value in Celsius, already clamped to 10-40
+        rainfall: Predicted rainfall (mm)
+        water_efficiency: Predicted water usage efficiency
+
+    Returns:
+        dict: Irrigation data as returned by predict_irrigation
+    """
+    rainfall = float(rainfall)
+    water_efficiency = float(water_efficiency)
 
     # Adjust water need based on temperature
-    if temperature < 22:
-        adjusted_water_need = total_water_need * 0.9
-    elif temperature > 30:
-        adjusted_water_need = total_water_need * 1.15
-    else:
-        adjusted_water_need = total_water_need
+    adjusted_water_need = TOTAL_WATER_NEED * float(water_need_factor(temperature))
 
     # Calculate irrigation required
     irrigation_required = max(0, adjusted_water_need - rainfall)
 
     # Adjust irrigation based on efficiency
-    if water_efficiency < 0.5:
-        irrigation_applied = irrigation_required / 0.5
+    if water_efficiency < MIN_IRRIGATION_EFFICIENCY:
+        irrigation_applied = irrigation_required / MIN_IRRIGATION_EFFICIENCY
     else:
         irrigation_applied = irrigation_required / water_efficiency
 
@@ -233,36 +369,14 @@ def predict_irrigation(model, temperature):
 
 def get_temperature_status(temperature):
     """Determine temperature status for rice growing"""
-    if temperature < 20:
-        return {
-            'status': 'cold',
-            'label': 'Cold',
-            'description': 'Below optimal - growth may be inhibited'
-        }
-    elif temperature < 25:
-        return {
-            'status': 'cool',
-            'label': 'Moderate',
-            'description': 'Acceptable for most rice varieties'
-        }
-    elif temperature < 30:
-        return {
-            'status': 'optimal',
-            'label': 'Optimal',
-            'description': 'Ideal range for rice growth'
-        }
-    elif temperature < 35:
-        return {
-            'status': 'hot',
-            'label': 'High',
-            'description': 'Watch for heat stress'
-        }
-    else:
-        return {
-            'status': 'extreme',
-            'label': 'Extreme',
-            'description': 'High risk of heat damage'
-        }
+    # Same lookup as the vectorized irrigation planner
+    status = TEMPERATURE_STATUSES[int(np.searchsorted(TEMPERATURE_THRESHOLDS, temperature, side='right'))]
+    label, description = TEMPERATURE_DESCRIPTIONS[status]
+    return {
+        'status': status,
+        'label': label,
+        'description': description
+    }
 
 
 def get_irrigation_recommendations(irrigation_data, temperature):
@@ -271,67 +385,43 @@ def get_irrigation_recommendations(irrigation_data, temperature):
     efficiency = irrigation_data['water_efficiency']
     temp_status = irrigation_data['temperature_status']['status']
 
-    recommendations = []
+    codes = []
 
     # Temperature-based recommendations
     if temp_status == 'cold':
-        recommendations.append("Consider delaying planting or using cold-tolerant varieties.")
+        codes.append('cold_planting')
     elif temp_status == 'hot' or temp_status == 'extreme':
-        recommendations.append("Increase irrigation frequency to reduce heat stress.")
+        codes.append('heat_stress')
 
     # Rainfall-based recommendations
-    if rainfall < 100:
-        recommendations.append("Implement full irrigation system. Maintain 5-7cm standing water in paddies.")
-        irrigation_status = "high"
-    elif rainfall < 200:
-        recommendations.append("Supplement with irrigation. Ensure field is flooded during critical stages.")
-        irrigation_status = "medium"
-    elif rainfall < 300:
-        recommendations.append("Implement moderate irrigation. Monitor water levels regularly.")
-        irrigation_status = "moderate"
-    elif rainfall < 400:
-        recommendations.append("Minimal irrigation needed. Focus on drainage during heavy rainfall.")
-        irrigation_status = "low"
-    else:
-        recommendations.append("Focus on drainage and flood prevention. No additional irrigation required.")
-        irrigation_status = "minimal"
+    irrigation_status = IRRIGATION_STATUSES[int(np.searchsorted(RAINFALL_THRESHOLDS, rainfall, side='right'))]
+    codes.append(f'rainfall_{irrigation_status}')
 
     # Efficiency-based recommendations
     if efficiency < 0.4:
-        recommendations.append(
-            "Improve irrigation infrastructure. Consider laser land leveling for even water distribution.")
+        codes.append('efficiency_poor')
     elif efficiency < 0.6:
-        recommendations.append("Implement water conservation practices such as alternate wetting and drying (AWD).")
+        codes.append('efficiency_fair')
 
     # Schedule recommendations
-    if irrigation_status == "high":
-        schedule = "Maintain 5-7cm standing water throughout the growing season. Irrigate every 3-4 days."
-    elif irrigation_status == "medium":
-        schedule = "Maintain 3-5cm standing water. Implement Alternate Wetting and Drying with 7-day cycles."
-    elif irrigation_status == "moderate":
-        schedule = "Use Alternate Wetting and Drying with 10-day cycles. Ensure soil is moist during critical stages."
-    elif irrigation_status == "low":
-        schedule = "Supplement only during dry spells. Focus on maintaining moist soil during critical growth stages."
-    else:
-        schedule = "Focus on drainage rather than irrigation. Monitor for waterlogging."
-
-    recommendations.append(f"Irrigation Schedule: {schedule}")
+    schedule = IRRIGATION_SCHEDULES[irrigation_status]
+    codes.append(f'schedule_{irrigation_status}')
 
     # Conservation tip
     if efficiency < 0.6:
-        recommendations.append(
-            "Water Conservation: Implement water-saving technologies such as drip irrigation or moisture sensors.")
+        codes.append('conservation')
 
     return {
-        'recommendations': recommendations,
+        'recommendations': [IRRIGATION_MESSAGES[code] for code in codes],
         'irrigation_status': irrigation_status,
-        'schedule': schedule
+        'schedule': schedule,
+        'codes': codes
     }
 
 
 def get_fertilizer_recommendations(soil_data):
     """Generate fertilizer recommendations based on soil nutrient levels"""
-    recommendations = []
+    codes = []
     nutrient_status = {}
 
     for nutrient in soil_data['nutrients']:
@@ -339,45 +429,26 @@ def get_fertilizer_recommendations(soil_data):
         status = nutrient['status']
         nutrient_status[name] = status
 
-        # Generate recommendation based on status
-        if status == 'deficient':
-            if name == 'N':
-                recommendations.append(
-                    f"Nitrogen is deficient. Apply nitrogen fertilizer (urea or ammonium sulfate) at 100-120 kg/ha.")
-            elif name == 'P':
-                recommendations.append(
-                    f"Phosphorus is deficient. Apply phosphate fertilizer (DAP or SSP) at 60-80 kg/ha.")
-            elif name == 'K':
-                recommendations.append(
-                    f"Potassium is deficient. Apply potassium fertilizer (KCl or K2SO4) at 60-80 kg/ha.")
-            elif name == 'OM':
-                recommendations.append(f"Organic Matter is low. Add compost or well-rotted manure at 5-10 tons/ha.")
-            else:
-                recommendations.append(f"{name} is deficient. Consider applying appropriate supplements.")
-        elif status == 'low':
-            if name in ['N', 'P', 'K']:
-                recommendations.append(f"{name} is somewhat low. Apply moderate amounts of fertilizer.")
-        elif status == 'excessive':
-            if name in ['N', 'P', 'K']:
-                recommendations.append(f"{name} is excessive. Reduce or avoid further application.")
+        # Only some status/nutrient combinations have advice (e.g. low Fe has none)
+        code = f'{name}_{status}'
+        if code in FERTILIZER_MESSAGES:
+            codes.append(code)
 
     # Add pH specific recommendations
     ph = soil_data['ph']
     if ph < 5.5:
-        recommendations.append(f"Soil is acidic (pH {ph}). Consider applying agricultural lime to raise pH.")
+        codes.append('ph_acidic')
     elif ph > 7.5:
-        recommendations.append(f"Soil is alkaline (pH {ph}). For rice, consider acidifying amendments if available.")
+        codes.append('ph_alkaline')
     else:
-        recommendations.append(f"Soil pH ({ph}) is in good range for rice cultivation.")
+        codes.append('ph_good')
 
     # Add balanced fertilization recommendation if needed
-    if 'N' in nutrient_status and 'P' in nutrient_status and 'K' in nutrient_status:
-        if nutrient_status['N'] == 'deficient' and nutrient_status['P'] == 'deficient' and nutrient_status[
-            'K'] == 'deficient':
-            recommendations.append(
-                "Apply balanced NPK fertilizer in split doses - 50% at planting, 25% during tillering, and 25% at panicle initiation.")
+    if all(nutrient_status.get(name) == 'deficient' for name in ('N', 'P', 'K')):
+        codes.append('balanced_npk')
 
     return {
-        'recommendations': recommendations,
-        'nutrient_status': nutrient_status
-    }
\ No newline at end of file
+        'recommendations': [FERTILIZER_MESSAGES[code].format(ph=ph) for code in codes],
+        'nutrient_status': nutrient_status,
+        'codes': codes
+    }
@@ -0,0 +1,295 @@
+import atexit
+import cProfile
+import hashlib
+import hmac
+import json
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from flask import g, request
+from .serialization import json_response
+
+PROFILING_MODES = ('sampling', 'cprofile')
+
+# Seconds between stack samples of a profiled request
+SAMPLE_INTERVAL = 0.005
+
+# Profiled requests aggregated in memory between writes to the profile directory
+FLUSH_EVERY = 20
+
+# Signed X-Profile tokens are accepted for this many seconds
+TOKEN_MAX_AGE = 300
+
+PROFILE_HEADER = 'X-Profile'
+
+# Library frames collapsed into one labelled frame: (path segment, label)
+LIBRARY_FRAMES = (
+    ('tensorflow', 'tensorflow'),
+    ('keras', 'tensorflow'),
+    ('sklearn', 'sklearn'),
+    ('jinja2', 'jinja'),
+    ('werkzeug', 'flask'),
+    ('flask', 'flask'),
+)
+
+# Decorator frames skipped when naming a library frame (Keras' error_handler wraps
+# Model.predict, sklearn's set_output wraps transform)
+WRAPPER_NAMES = {'error_handler', 'wrapped', 'wrapper', 'inner', '__call__'}
+
+_LIBRARY_SEGMENTS = tuple((f'{os.sep}{segment}{os.sep}', label) for segment, label in LIBRARY_FRAMES)
+
+
+def sign_profile_request(secret, path, timestamp=None):
+    """
+    X-Profile header value that asks the server to profile a request to `path`
+
+    Args:
+        secret: The server's PROFILING_SECRET
+        path: Request path, e.g. '/analyze'
+        timestamp: Signing time (defaults to now)
+
+    Returns:
+        str: '<timestamp>:<hex HMAC-SHA256>'
+    """
+    timestamp = int(time.time() if timestamp is None else timestamp)
+    message = f'{timestamp}:{path}'.encode('utf-8')
+    return f'{timestamp}:{hmac.new(secret.encode("utf-8"), message, hashlib.sha256).hexdigest()}'
+
+
+def verify_profile_token(secret, path, token, now=None):
+    try:
+        timestamp = int(token.split(':', 1)[0])
+    except (AttributeError, ValueError):
+        return False
+    now = time.time() if now is None else now
+    if abs(now - timestamp) > TOKEN_MAX_AGE:
+        return False
+    return hmac.compare_digest(sign_profile_request(secret, path, timestamp), token)
+
+
+def frame_category(filename):
+    """Label of the library a code file belongs to ('tensorflow', 'sklearn', ...), or None"""
+    if filename.endswith('.html'):
+        # Compiled Jinja templates report the template file as their filename
+        return 'template'
+    for segment, label in _LIBRARY_SEGMENTS:
+        if segment in filename:
+            return label
+    return None
+
+
+def collapse_stack(frame):
+    """
+    Render a Python stack as a collapsed-stack line, root first
+
+    Consecutive frames inside the same library become one '[label] function'
+    frame (named after the entry point, skipping decorators), so TensorFlow predict, sklearn scaler
+    calls and Jinja rendering show up as single, separate frames.
+    """
+    codes = []
+    while frame is not None:
+        codes.append(frame.f_code)
+        frame = frame.f_back
+
+    parts = []
+    previous = None
+    entry_name = None
+    for code in reversed(codes):
+        category = frame_category(code.co_filename)
+        if category == 'template':
+            parts.append(f'[jinja] {os.path.basename(code.co_filename)}:{code.co_name}')
+        elif category is None:
+            module = os.path.splitext(os.path.basename(code.co_filename))[0]
+            parts.append(f'{module}.{code.co_name}')
+        elif category != previous:
+            parts.append(f'[{category}] {code.co_name}')
+            entry_name = code.co_name
+        elif entry_name in WRAPPER_NAMES and code.co_name not in WRAPPER_NAMES:
+            entry_name = code.co_name
+            parts[-1] = f'[{category}] {entry_name}'
+        previous = category
+    return ';'.join(parts)
+
+
+class StackSampler:
+    """
+    One background thread sampling the stacks of every request being profiled
+
+    The thread only wakes while at least one request is registered.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self._active = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self, thread_id):
+        counts = Counter()
+        with self._lock:
+            self._active[thread_id] = counts
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return counts
+
+    def stop(self, thread_id):
+        with self._lock:
+            return self._active.pop(thread_id, Counter())
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            with self._lock:
+                if not self._active:
+                    self._wake.clear()
+                    continue
+                frames = sys._current_frames()
+                for thread_id, counts in self._active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        counts[collapse_stack(frame)] += 1
+                del frames
+            time.sleep(self.interval)
+
+
+class ProfileAggregator:
+    """
+    Profiles of many requests merged per endpoint and written to `directory`
+
+    Sampling mode writes '<endpoint>.<pid>.collapsed' (one 'frame;frame count'
+    line per stack, the input format of flamegraph.pl and speedscope). cProfile
+    mode writes '<endpoint>.<pid>.prof' for pstats/snakeviz plus a JSON summary
+    of the time spent in each library. Files are per process, so several
+    workers never overwrite each other; collapsed files can simply be
+    concatenated.
+    """
+
+    def __init__(self, directory, flush_every=FLUSH_EVERY):
+        self.directory = directory
+        self.flush_every = flush_every
+        self._stacks = {}
+        self._stats = {}
+        self._requests = Counter()
+        self._pending = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def add_stacks(self, endpoint, counts, flush=False):
+        with self._lock:
+            self._stacks.setdefault(endpoint, Counter()).update(counts)
+            self._requests[endpoint] += 1
+            self._pending += 1
+            flush = flush or self._pending >= self.flush_every
+        if flush:
+            self.flush()
+
+    def add_profile(self, endpoint, profile, flush=False):
+        with self._lock:
+            if endpoint in self._stats:
+                self._stats[endpoint].add(profile)
+            else:
+                self._stats[endpoint] = pstats.Stats(profile)
+            self._requests[endpoint] += 1
+            self._pending += 1
+            flush = flush or self._pending >= self.flush_every
+        if flush:
+            self.flush()
+
+    def _path(self, endpoint, extension):
+        safe = re.sub(r'[^A-Za-z0-9_.-]', '_', endpoint)
+        return os.path.join(self.directory, f'{safe}.{os.getpid()}.{extension}')
+
+    def flush(self):
+        with self._lock:
+            self._pending = 0
+            for endpoint, counts in self._stacks.items():
+                with open(self._path(endpoint, 'collapsed'), 'w') as f:
+                    for stack, count in counts.most_common():
+                        f.write(f'{stack} {count}\n')
+            for endpoint, stats in self._stats.items():
+                stats.dump_stats(self._path(endpoint, 'prof'))
+                summary = {'requests': self._requests[endpoint], 'seconds_by_library': library_times(stats)}
+                with open(self._path(endpoint, 'json'), 'w') as f:
+                    json.dump(summary, f, indent=2)
+
+
+def library_times(stats):
+    """Own time (seconds) spent in TensorFlow, sklearn, Jinja and application code"""
+    totals = Counter()
+    for (filename, _, _), (_, _, own_time, _, _) in stats.stats.items():
+        category = frame_category(filename)
+        if category == 'template':
+            category = 'jinja'
+        totals[category or 'other'] += own_time
+    return {category: round(seconds, 6) for category, seconds in totals.most_common()}
+
+
+def init_profiling(app):
+    """
+    Profile selected requests when PROFILING_SAMPLE_RATE or PROFILING_SECRET is set
+
+    With PROFILING_SAMPLE_RATE > 0 that fraction of requests is profiled. With a
+    PROFILING_SECRET, any request carrying a valid signed X-Profile header (see
+    sign_profile_request) is profiled and its profile written immediately. When
+    neither is configured no hooks are registered at all.
+
+    cProfile allows one active profiler per process, so in that mode a request
+    arriving while another is profiled runs unprofiled, or gets a 409 if it
+    asked for a profile with a signed header.
+    """
+    rate = app.config.get('PROFILING_SAMPLE_RATE', 0)
+    secret = app.config.get('PROFILING_SECRET')
+    if not rate and not secret:
+        return None
+
+    mode = app.config.get('PROFILING_MODE', 'sampling')
+    if mode not in PROFILING_MODES:
+        raise ValueError(f"PROFILING_MODE must be one of: {', '.join(PROFILING_MODES)}")
+
+    aggregator = ProfileAggregator(app.config['PROFILING_DIR'])
+    sampler = StackSampler() if mode == 'sampling' else None
+    cprofile_lock = threading.Lock()
+    atexit.register(aggregator.flush)
+    print(f"Profiling enabled ({mode}, sample rate {rate}); writing to {aggregator.directory}")
+
+    @app.before_request
+    def start_profile():
+        token = request.headers.get(PROFILE_HEADER)
+        signed = bool(secret and token and verify_profile_token(secret, request.path, token))
+        if not signed and not (rate and random.random() < rate):
+            return
+        g.profile_signed = signed
+        if sampler is not None:
+            g.profile_thread = threading.get_ident()
+            sampler.start(g.profile_thread)
+        elif cprofile_lock.acquire(blocking=False):
+            g.profiler = cProfile.Profile()
+            try:
+                g.profiler.enable()
+            except BaseException:
+                g.pop('profiler')
+                cprofile_lock.release()
+                raise
+        elif signed:
+            return json_response({'error': 'Another request is being profiled; retry shortly'}, 409)
+
+    @app.teardown_request
+    def finish_profile(error=None):
+        endpoint = request.endpoint or 'unmatched'
+        if 'profile_thread' in g:
+            aggregator.add_stacks(endpoint, sampler.stop(g.pop('profile_thread')), flush=g.profile_signed)
+        elif 'profiler' in g:
+            profiler = g.pop('profiler')
+            profiler.disable()
+            cprofile_lock.release()
+            aggregator.add_profile(endpoint, profiler, flush=g.profile_signed)
+
+    return aggregator
@@ -0,0 +1,203 @@
+import hashlib
+import itertools
+import math
+import os
+import sqlite3
+import threading
+import time
+from flask import g, request
+from .db import ThreadConnections
+from .serialization import json_response
+
+API_KEY_HEADER = 'X-API-Key'
+
+# Retry-After (seconds) sent when every inference slot is busy
+BUSY_RETRY_AFTER = 1
+
+# In-memory buckets kept before idle (full) ones are swept
+MAX_BUCKETS = 100000
+
+# Fraction of MAX_BUCKETS left after a sweep, so sweeps stay many requests apart
+SWEEP_TARGET = 0.9
+
+# SQLite backend: sweep idle buckets every this many calls
+SWEEP_EVERY = 1000
+
+
+def key_digest(api_key):
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:32]
+
+
+def client_key(api_keys=frozenset()):
+    """
+    Rate-limit key of the current request
+
+    Args:
+        api_keys: key_digest of every configured API key
+
+    Returns:
+        str: The request's API key if it is a configured one, else its address.
+            Unknown keys don't get a bucket of their own, or clients could
+            reset their limit by sending a new key with every request.
+    """
+    api_key = request.headers.get(API_KEY_HEADER)
+    if api_key and api_keys:
+        digest = key_digest(api_key)
+        if digest in api_keys:
+            return 'key:' + digest
+    return f'ip:{request.remote_addr}'
+
+
+def refill(tokens, updated, now, rate, burst):
+    return min(burst, tokens + max(0.0, now - updated) * rate)
+
+
+class MemoryBuckets:
+    """Token buckets for one process"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, cost=1, now=None):
+        """
+        Take `cost` tokens from `key`'s bucket
+
+        Returns:
+            tuple: (allowed, seconds until enough tokens are available)
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (self.burst, now))
+            tokens = refill(tokens, updated, now, self.rate, self.burst)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            # Re-insert so the dict stays ordered by last update
+            self._buckets.pop(key, None)
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > MAX_BUCKETS:
+                self._sweep(now)
+        return allowed, 0.0 if allowed else (cost - tokens) / self.rate
+
+    def _sweep(self, now):
+        # A bucket that has refilled completely is the same as no bucket
+        self._buckets = {key: state for key, state in self._buckets.items()
+                         if refill(*state, now, self.rate, self.burst) < self.burst}
+        # Still crowded with partly used buckets: forget the least recently updated
+        excess = len(self._buckets) - int(MAX_BUCKETS * SWEEP_TARGET)
+        for key in list(itertools.islice(self._buckets, max(0, excess))):
+            del self._buckets[key]
+
+
+class SQLiteBuckets:
+    """
+    Token buckets shared by every worker process on a host
+
+    Each take is one short write transaction, so all gunicorn workers enforce
+    a single limit per client instead of one limit each.
+    """
+
+    def __init__(self, path, rate, burst):
+        self.path = path
+        self.rate = rate
+        self.burst = burst
+        self._connections = ThreadConnections(path, timeout=5, isolation_level=None, synchronous='OFF')
+        self._calls = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def _connection(self):
+        return self._connections.get()
+
+    def take(self, key, cost=1, now=None):
+        # Wall-clock time: monotonic clocks aren't comparable between processes
+        now = time.time() if now is None else now
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens = self.burst if row is None else refill(row[0], row[1], now, self.rate, self.burst)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            conn.execute("INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                         (key, tokens, now))
+            self._calls += 1
+            if self._calls % SWEEP_EVERY == 0:
+                conn.execute("DELETE FROM buckets WHERE updated < ?", (now - self.burst / self.rate,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed, 0.0 if allowed else (cost - tokens) / self.rate
+
+
+def too_many_requests(message, retry_after):
+    return json_response({'error': message}, 429, headers={'Retry-After': str(max(1, math.ceil(retry_after)))})
+
+
+def init_rate_limiting(app, limited_endpoints, inference_endpoints):
+    """
+    Admission control in front of the routes that run the models
+
+    Both checks run in before_request, i.e. before the view reads (and
+    Werkzeug parses) the request body, so shed requests cost almost nothing:
+    - RATE_LIMIT_PER_SECOND / RATE_LIMIT_BURST: token bucket per client
+      address (request.remote_addr, so put ProxyFix in front of the app when
+      it runs behind a proxy), or per API key for keys listed in RATE_LIMIT_API_KEYS, for
+      `limited_endpoints`; shared between workers through RATE_LIMIT_PATH when set
+    - INFERENCE_CONCURRENCY: requests to `inference_endpoints` running at once
+      in this process; others wait up to INFERENCE_QUEUE_TIMEOUT seconds for a
+      slot and are then turned away
+    Both answer 429 with Retry-After. A limit of 0 disables that check.
+    """
+    rate = app.config.get('RATE_LIMIT_PER_SECOND', 0)
+    concurrency = app.config.get('INFERENCE_CONCURRENCY', 0)
+
+    api_keys = frozenset(key_digest(key) for key in app.config.get('RATE_LIMIT_API_KEYS') or ())
+
+    buckets = None
+    if rate > 0:
+        burst = app.config.get('RATE_LIMIT_BURST') or max(1.0, rate)
+        path = app.config.get('RATE_LIMIT_PATH')
+        buckets = SQLiteBuckets(path, rate, burst) if path else MemoryBuckets(rate, burst)
+
+    slots = threading.BoundedSemaphore(concurrency) if concurrency > 0 else None
+    queue_timeout = app.config.get('INFERENCE_QUEUE_TIMEOUT', 0)
+
+    if buckets is None and slots is None:
+        return None
+
+    @app.before_request
+    def admit_request():
+        if buckets is not None and request.endpoint in limited_endpoints:
+            try:
+                allowed, retry_after = buckets.take(client_key(api_keys))
+            except sqlite3.Error as e:
+                # Fail open: a busy limiter database shouldn't take the site down
+                print(f"Error checking rate limit: {e}")
+                allowed = True
+            if not allowed:
+                return too_many_requests('Rate limit exceeded', retry_after)
+
+        if slots is not None and request.endpoint in inference_endpoints:
+            if queue_timeout > 0:
+                acquired = slots.acquire(timeout=queue_timeout)
+            else:
+                acquired = slots.acquire(blocking=False)
+            if not acquired:
+                return too_many_requests('Server busy, try again shortly', BUSY_RETRY_AFTER)
+            g.inference_slot = True
+
+    @app.teardown_request
+    def release_slot(error=None):
+        if g.pop('inference_slot', False):
+            slots.release()
+
+    return buckets
@@ -0,0 +1,157 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from .db import ThreadConnections
+from .serialization import dumps, loads
+
+# Bump when the shape of stored results changes so old entries are ignored
+RESULT_SCHEMA_VERSION = 1
+
+RESULT_STORE_MAX_ENTRIES = 10000
+
+# Inputs are rounded before hashing so 6.5 and 6.50000001 hit the same entry
+INPUT_DECIMALS = 4
+
+
+def request_digest(ph_value, temperature, image_hash=None):
+    """
+    Key identifying an analysis by its normalized inputs
+
+    Args:
+        ph_value: Soil pH value
+        temperature: Temperature value in Celsius
+        image_hash: Content hash of the uploaded image, if any
+
+    Returns:
+        str: Hex digest
+    """
+    normalized = '|'.join([
+        f'v{RESULT_SCHEMA_VERSION}',
+        repr(round(float(ph_value), INPUT_DECIMALS)),
+        repr(round(float(temperature), INPUT_DECIMALS)),
+        image_hash or ''
+    ])
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class _Flight:
+    """An in-progress computation that identical requests wait on"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ResultStore:
+    """
+    SQLite-backed store of analysis results keyed by request digest
+
+    Entries are evicted least-recently-used first once there are more than
+    `max_entries`. Concurrent requests for the same key within a process share
+    one computation (single-flight); across processes the SQLite file is shared
+    so a finished result is visible to every worker.
+    """
+
+    def __init__(self, path=None, max_entries=RESULT_STORE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._connections = ThreadConnections(path)
+        self._flights = {}
+        self._lock = threading.Lock()
+
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with self._connection() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS results ("
+                    " key TEXT PRIMARY KEY,"
+                    " body BLOB NOT NULL,"
+                    " created_at REAL NOT NULL,"
+                    " accessed_at REAL NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed_at)")
+
+    def _connection(self):
+        return self._connections.get()
+
+    def get(self, key):
+        if not self.path:
+            return None
+        with self._connection() as conn:
+            row = conn.execute("SELECT body FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return loads(row[0])
+
+    def put(self, key, results):
+        if not self.path:
+            return
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (key, body, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, dumps(results), now, now)
+            )
+            excess = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0] - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM results WHERE key IN "
+                    "(SELECT key FROM results ORDER BY accessed_at LIMIT ?)",
+                    (excess,)
+                )
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the stored result for `key`, computing and storing it on a miss
+
+        Args:
+            key: Request digest
+            compute: Zero-argument callable producing the results
+
+        Returns:
+            tuple: (results, hit) where hit is False only for the caller that computed
+        """
+        try:
+            results = self.get(key)
+        except sqlite3.Error as e:
+            print(f"Warning: result store unavailable: {e}")
+            results = None
+        if results is not None:
+            return results, True
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result = compute()
+            try:
+                self.put(key, flight.result)
+            except sqlite3.Error as e:
+                # The result is still good; it just won't be reused
+                print(f"Warning: could not store result: {e}")
+            return flight.result, False
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.event.set()
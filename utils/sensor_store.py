@@ -0,0 +1,373 @@
+import os
+import re
+import threading
+import time
+import numpy as np
+from .predictions import predict_soil_nutrients, predict_irrigation
+
+# Metrics reported by the field probes
+SENSOR_METRICS = ('ph', 'temperature')
+
+# Rolling windows reported for every field, in seconds
+AGGREGATE_WINDOWS = {
+    '1h': 60 * 60,
+    '24h': 24 * 60 * 60,
+    '7d': 7 * 24 * 60 * 60
+}
+
+# Window whose mean is fed to the prediction models
+PREDICTION_WINDOW = '1h'
+
+# Aggregated inputs are rounded before comparison so probe jitter doesn't re-run the models
+PREDICTION_PRECISION = {'ph': 1, 'temperature': 1}
+
+# Field IDs end up in file names, so keep them simple
+FIELD_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+INITIAL_CAPACITY = 256
+
+# Readings may be stamped at most this many seconds ahead of the server clock
+MAX_CLOCK_SKEW = 5 * 60
+
+
+def is_valid_field_id(field_id):
+    return bool(FIELD_ID_PATTERN.match(field_id or ''))
+
+
+def _column(name, values, missing):
+    """One payload column as a flat float64 array, with None replaced by `missing`"""
+    if not isinstance(values, list):
+        raise ValueError(f"{name} must be a list")
+    if any(isinstance(v, bool) for v in values):
+        raise ValueError(f"{name} must contain only numbers")
+    column = np.array([missing if v is None else v for v in values], dtype=np.float64)
+    if column.ndim != 1:
+        raise ValueError(f"{name} must be a flat list of numbers")
+    return column
+
+
+def readings_to_columns(payload, now=None):
+    """
+    Convert a bulk ingestion payload into per-metric (timestamps, values) arrays
+
+    Accepts either row format ({"readings": [{"timestamp": ..., "ph": ...}, ...]}
+    or a bare list of rows) or column format ({"timestamp": [...], "ph": [...]}).
+    Readings without a timestamp are stamped with the current time. Timestamps
+    are Unix seconds; negative ones, or ones more than MAX_CLOCK_SKEW ahead of
+    `now` (e.g. milliseconds), are rejected since a single one would pin the
+    field's latest time and turn every later reading away as out of order.
+
+    Args:
+        payload: Decoded JSON body
+        now: Timestamp used for readings without one
+
+    Returns:
+        dict: metric -> (timestamps, values) float64 arrays, NaN values dropped
+
+    Raises:
+        ValueError: If the payload is malformed or a timestamp is out of range
+    """
+    now = time.time() if now is None else now
+
+    if isinstance(payload, dict) and 'readings' in payload:
+        payload = payload['readings']
+
+    if isinstance(payload, list):
+        # Row format - transpose into columns
+        if not all(isinstance(row, dict) for row in payload):
+            raise ValueError("Each reading must be an object")
+        columns = {
+            'timestamp': [row.get('timestamp', now) for row in payload]
+        }
+        for metric in SENSOR_METRICS:
+            columns[metric] = [row.get(metric) for row in payload]
+    elif isinstance(payload, dict):
+        columns = payload
+    else:
+        raise ValueError("Expected a list of readings or an object of columns")
+
+    lengths = {len(columns[key]) for key in columns
+               if key in SENSOR_METRICS or key == 'timestamp'}
+    if len(lengths) > 1:
+        raise ValueError("All columns must have the same length")
+
+    if not any(metric in columns for metric in SENSOR_METRICS):
+        raise ValueError(f"Payload must contain at least one of: {', '.join(SENSOR_METRICS)}")
+
+    size = lengths.pop() if lengths else 0
+    timestamps = columns.get('timestamp')
+    if timestamps is None:
+        timestamps = np.full(size, now, dtype=np.float64)
+    else:
+        timestamps = _column('timestamp', timestamps, now)
+        bad = ~((timestamps >= 0) & (timestamps <= now + MAX_CLOCK_SKEW))
+        if bad.any():
+            raise ValueError(f"timestamp[{int(np.argmax(bad))}] must be Unix seconds, "
+                             f"not negative or in the future")
+
+    result = {}
+    for metric in SENSOR_METRICS:
+        if metric not in columns:
+            continue
+        values = _column(metric, columns[metric], np.nan)
+        keep = np.isfinite(values) & np.isfinite(timestamps)
+        result[metric] = (timestamps[keep], values[keep])
+
+    return result
+
+
+class _Series:
+    """Append-only (timestamp, value) column for one metric of one field"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.times = np.empty(INITIAL_CAPACITY, dtype=np.float64)
+        self.values = np.empty(INITIAL_CAPACITY, dtype=np.float64)
+        # Prefix sums of values so any window mean is O(1)
+        self.prefix = np.zeros(INITIAL_CAPACITY + 1, dtype=np.float64)
+        self.size = 0
+        # Bytes of the backing file already folded into memory
+        self.consumed = 0
+
+        # Whole-series aggregates, updated on every append
+        self.minimum = np.inf
+        self.maximum = -np.inf
+
+    @property
+    def latest_time(self):
+        return self.times[self.size - 1] if self.size else -np.inf
+
+    def _reserve(self, extra):
+        needed = self.size + extra
+        if needed <= len(self.times):
+            return
+        capacity = max(needed, 2 * len(self.times))
+        for name in ('times', 'values'):
+            grown = np.empty(capacity, dtype=np.float64)
+            grown[:self.size] = getattr(self, name)[:self.size]
+            setattr(self, name, grown)
+        prefix = np.zeros(capacity + 1, dtype=np.float64)
+        prefix[:self.size + 1] = self.prefix[:self.size + 1]
+        self.prefix = prefix
+
+    def monotonic(self, times, values):
+        """Drop readings older than what the series already holds"""
+        order = np.argsort(times, kind='stable')
+        times, values = times[order], values[order]
+        keep = times >= self.latest_time
+        return times[keep], values[keep]
+
+    def extend(self, times, values):
+        """Fold already-ordered readings into the in-memory columns"""
+        count = len(times)
+        if count == 0:
+            return
+        self._reserve(count)
+        start, end = self.size, self.size + count
+        self.times[start:end] = times
+        self.values[start:end] = values
+        self.prefix[start + 1:end + 1] = self.prefix[start] + np.cumsum(values)
+        self.size = end
+
+        self.minimum = min(self.minimum, float(values.min()))
+        self.maximum = max(self.maximum, float(values.max()))
+
+    def write(self, times, values):
+        """Append readings to the backing file (one interleaved float64 pair per reading)"""
+        pairs = np.column_stack((times, values)).astype(np.float64)
+        with open(self.path, 'ab') as f:
+            try:
+                import fcntl
+                fcntl.flock(f, fcntl.LOCK_EX)
+            except ImportError:
+                pass
+            f.write(pairs.tobytes())
+
+    def sync(self):
+        """Pick up readings appended to the backing file by this or another worker"""
+        if self.path is None or not os.path.exists(self.path):
+            return
+        # Only read whole pairs; a concurrent writer may be mid-append
+        available = os.path.getsize(self.path) // 16 * 16
+        if available <= self.consumed:
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(self.consumed)
+            pairs = np.frombuffer(f.read(available - self.consumed), dtype=np.float64).reshape(-1, 2)
+        self.consumed = available
+
+        # Keep the file order but skip anything that went backwards in time
+        times, values = pairs[:, 0], pairs[:, 1]
+        running = np.maximum.accumulate(np.concatenate(([self.latest_time], times)))[:-1]
+        keep = times >= running
+        self.extend(times[keep], values[keep])
+
+    def window(self, seconds):
+        """Aggregates over the readings within `seconds` of the latest one"""
+        if self.size == 0:
+            return None
+        start = int(np.searchsorted(self.times[:self.size], self.latest_time - seconds, side='left'))
+        count = self.size - start
+        window_values = self.values[start:self.size]
+        return {
+            'count': count,
+            'mean': float((self.prefix[self.size] - self.prefix[start]) / count),
+            'min': float(window_values.min()),
+            'max': float(window_values.max())
+        }
+
+    def summary(self):
+        if self.size == 0:
+            return None
+        summary = {
+            'count': self.size,
+            'latest': float(self.values[self.size - 1]),
+            'latest_timestamp': float(self.latest_time),
+            'mean': float(self.prefix[self.size] / self.size),
+            'min': self.minimum,
+            'max': self.maximum,
+            'windows': {}
+        }
+        for name, seconds in AGGREGATE_WINDOWS.items():
+            summary['windows'][name] = self.window(seconds)
+        return summary
+
+
+class _Field:
+    def __init__(self, directory=None):
+        self.lock = threading.Lock()
+        self.series = {}
+        for metric in SENSOR_METRICS:
+            path = os.path.join(directory, f'{metric}.f64') if directory else None
+            self.series[metric] = _Series(path)
+
+        # Last model inputs and outputs per metric
+        self.prediction_inputs = {}
+        self.predictions = {}
+
+
+class SensorStore:
+    """
+    Per-field store of probe readings with incrementally maintained aggregates
+
+    Readings are kept as growing NumPy columns. When a directory is given every
+    field also gets append-only files on disk, which other workers pick up on
+    their next read so aggregates stay consistent across processes.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self._fields = {}
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _field(self, field_id, create=False):
+        with self._lock:
+            field = self._fields.get(field_id)
+            if field is not None:
+                return field
+
+            field_dir = os.path.join(self.directory, field_id) if self.directory else None
+            if not create and not (field_dir and os.path.isdir(field_dir)):
+                return None
+            if field_dir:
+                os.makedirs(field_dir, exist_ok=True)
+
+            field = _Field(field_dir)
+            self._fields[field_id] = field
+            return field
+
+    def ingest(self, field_id, columns):
+        """
+        Append readings for a field
+
+        Args:
+            field_id: Field identifier
+            columns: Output of readings_to_columns
+
+        Returns:
+            dict: Number of accepted and rejected (out-of-order) readings
+        """
+        field = self._field(field_id, create=True)
+        accepted = 0
+        rejected = 0
+
+        with field.lock:
+            for metric, (times, values) in columns.items():
+                series = field.series[metric]
+                series.sync()
+                kept_times, kept_values = series.monotonic(times, values)
+                accepted += len(kept_times)
+                rejected += len(times) - len(kept_times)
+
+                if series.path:
+                    series.write(kept_times, kept_values)
+                    series.sync()
+                else:
+                    series.extend(kept_times, kept_values)
+
+        return {'accepted': accepted, 'rejected': rejected}
+
+    def aggregates(self, field_id):
+        """
+        Return the rolling aggregates of every metric for a field
+
+        Returns:
+            dict or None: metric -> summary, None if the field is unknown
+        """
+        field = self._field(field_id)
+        if field is None:
+            return None
+
+        with field.lock:
+            summaries = {}
+            for metric, series in field.series.items():
+                series.sync()
+                summaries[metric] = series.summary()
+            return summaries
+
+    def predictions(self, field_id, nutrient_model, irrigation_model):
+        """
+        Run the soil and irrigation models on the field's aggregated inputs
+
+        The models only run again when the rounded window mean of their input
+        changed since the previous call; otherwise the cached output is returned.
+
+        Returns:
+            dict or None: Model inputs, outputs and which of them were recomputed
+        """
+        field = self._field(field_id)
+        if field is None:
+            return None
+
+        predictors = {
+            'ph': lambda value: predict_soil_nutrients(nutrient_model, value),
+            'temperature': lambda value: predict_irrigation(irrigation_model, value)
+        }
+
+        with field.lock:
+            inputs = {}
+            recomputed = []
+            for metric, series in field.series.items():
+                series.sync()
+                window = series.window(AGGREGATE_WINDOWS[PREDICTION_WINDOW])
+                if window is None:
+                    inputs[metric] = None
+                    continue
+
+                value = round(window['mean'], PREDICTION_PRECISION[metric])
+                inputs[metric] = value
+                if field.prediction_inputs.get(metric) != value:
+                    field.predictions[metric] = predictors[metric](value)
+                    field.prediction_inputs[metric] = value
+                    recomputed.append(metric)
+
+            return {
+                'inputs': inputs,
+                'window': PREDICTION_WINDOW,
+                'soil_nutrients': field.predictions.get('ph') if inputs['ph'] is not None else None,
+                'irrigation_data': (field.predictions.get('temperature')
+                                    if inputs['temperature'] is not None else None),
+                'recomputed': recomputed
+            }
@@ -0,0 +1,43 @@
+import json
+import numpy as np
+from flask import current_app
+
+try:
+    import orjson
+except ImportError:
+    # orjson is optional; the stdlib encoder is used without it
+    orjson = None
+
+
+def _encode_numpy(obj):
+    """JSON-compatible value of numpy scalars and arrays, for whichever encoder is in use"""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj):
+    """
+    Encode `obj` as compact UTF-8 JSON bytes
+
+    Uses orjson when it is installed, otherwise the stdlib encoder with
+    separators that drop the default whitespace. Both accept numpy scalars
+    and arrays.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=_encode_numpy, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False, default=_encode_numpy).encode('utf-8')
+
+
+def json_response(obj, status=200, headers=None):
+    """Build a Flask JSON response using the fast encoder"""
+    return current_app.response_class(dumps(obj), status=status, headers=headers, mimetype='application/json')
+
+
+def loads(data):
+    """Decode JSON produced by dumps"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
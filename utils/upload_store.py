@@ -0,0 +1,237 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from .db import ThreadConnections
+
+# Uploads untouched for this long are deleted by compaction
+UPLOAD_TTL_SECONDS = 30 * 24 * 60 * 60
+
+# Least-recently-used uploads are deleted once the total exceeds this many bytes
+UPLOAD_MAX_BYTES = 1024 * 1024 * 1024
+
+# Seconds between background compaction passes
+COMPACTION_INTERVAL = 60 * 60
+
+# Two levels of two hex characters: 65536 leaf directories keep each one small
+SHARD_DEPTH = 2
+SHARD_WIDTH = 2
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def shard_path(digest, extension):
+    """
+    Relative path of an upload inside the store, e.g. 'ab/cd/abcd...ef.jpg'
+
+    Args:
+        digest: Hex content hash
+        extension: File extension including the dot
+
+    Returns:
+        str: Relative path using '/' separators
+    """
+    parts = [digest[i * SHARD_WIDTH:(i + 1) * SHARD_WIDTH] for i in range(SHARD_DEPTH)]
+    return '/'.join(parts + [digest + extension.lower()])
+
+
+class UploadStore:
+    """
+    Content-addressed upload directory with a SQLite index
+
+    Files are stored under hash-sharded subdirectories of `root`, so no single
+    directory grows without bound and identical uploads are kept once. The
+    index records size and timestamps for every file, which makes "latest
+    image" an index lookup and lets compaction enforce a TTL and a total size
+    budget (least recently used first) without scanning the directory tree.
+    """
+
+    def __init__(self, root, index_path, ttl=UPLOAD_TTL_SECONDS, max_bytes=UPLOAD_MAX_BYTES):
+        self.root = root
+        self.index_path = index_path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._connections = ThreadConnections(index_path)
+        self._compactor = None
+        self._stopping = threading.Event()
+
+        os.makedirs(root, exist_ok=True)
+        os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS uploads ("
+                " digest TEXT PRIMARY KEY,"
+                " path TEXT NOT NULL,"
+                " name TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " is_image INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS uploads_created ON uploads (is_image, created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS uploads_accessed ON uploads (accessed_at)")
+        self._adopt_flat_files()
+
+    def _connection(self):
+        return self._connections.get()
+
+    def _adopt_flat_files(self):
+        """Index images saved directly in `root` by the old flat layout, leaving them where they are"""
+        with os.scandir(self.root) as entries:
+            files = [entry for entry in entries
+                     if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS)]
+        if not files:
+            return
+        with self._connection() as conn:
+            for entry in files:
+                stat = entry.stat()
+                conn.execute(
+                    "INSERT OR IGNORE INTO uploads (digest, path, name, size, is_image, created_at, accessed_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (f'flat:{entry.name}', entry.name, entry.name, stat.st_size, 1, stat.st_mtime, stat.st_mtime)
+                )
+
+    def save(self, data, name):
+        """
+        Store an upload, or refresh the existing copy of identical content
+
+        There is one file per content hash: identical bytes uploaded again under
+        another extension reuse the indexed file (and its extension), so every
+        file on disk is tracked by exactly one index row.
+
+        Args:
+            data: File contents
+            name: Original (already secured) filename, used for the extension
+
+        Returns:
+            str: Path relative to `root`
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        extension = os.path.splitext(name)[1].lower()
+        now = time.time()
+
+        # Claim the row first so concurrent saves of the same bytes agree on the path
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO uploads (digest, path, name, size, is_image, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (digest) DO UPDATE SET created_at = excluded.created_at,"
+                " accessed_at = excluded.accessed_at",
+                (digest, shard_path(digest, extension), name, len(data),
+                 int(extension in IMAGE_EXTENSIONS), now, now)
+            )
+            relative = conn.execute("SELECT path FROM uploads WHERE digest = ?", (digest,)).fetchone()[0]
+
+        full_path = os.path.join(self.root, *relative.split('/'))
+        if not os.path.exists(full_path):
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            # Write then rename so concurrent readers never see a partial file
+            temp_path = f"{full_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, full_path)
+        return relative
+
+    def latest_image(self):
+        """Path (relative to `root`) of the most recently uploaded image, or None"""
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT path FROM uploads WHERE is_image = 1 ORDER BY created_at DESC LIMIT 1"
+            ).fetchone()
+        return row[0] if row else None
+
+    def path_for(self, digest):
+        """Path (relative to `root`) of the stored upload with this content digest, or None"""
+        with self._connection() as conn:
+            row = conn.execute("SELECT path FROM uploads WHERE digest = ?", (digest,)).fetchone()
+        return row[0] if row else None
+
+    def touch(self, path):
+        """Mark an upload as used so LRU eviction keeps it longer"""
+        with self._connection() as conn:
+            conn.execute("UPDATE uploads SET accessed_at = ? WHERE path = ?", (time.time(), path))
+
+    def stats(self):
+        with self._connection() as conn:
+            count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM uploads").fetchone()
+        return {'files': count, 'bytes': total}
+
+    def compact(self, now=None):
+        """
+        Delete expired uploads, then least recently used ones until under the size budget
+
+        Returns:
+            dict: Number of files and bytes removed
+        """
+        now = time.time() if now is None else now
+        with self._connection() as conn:
+            doomed = conn.execute(
+                "SELECT digest, path, size, accessed_at FROM uploads WHERE accessed_at < ?", (now - self.ttl,)
+            ).fetchall()
+
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM uploads").fetchone()[0]
+            total -= sum(size for _, _, size, _ in doomed)
+            if total > self.max_bytes:
+                expired = {digest for digest, _, _, _ in doomed}
+                for digest, path, size, accessed_at in conn.execute(
+                        "SELECT digest, path, size, accessed_at FROM uploads ORDER BY accessed_at"):
+                    if total <= self.max_bytes:
+                        break
+                    if digest in expired:
+                        continue
+                    doomed.append((digest, path, size, accessed_at))
+                    total -= size
+
+            # Skip uploads saved or touched since they were selected, and remove the
+            # files before committing so a concurrent save waits and then rewrites them
+            removed = []
+            for digest, path, size, accessed_at in doomed:
+                deleted = conn.execute(
+                    "DELETE FROM uploads WHERE digest = ? AND accessed_at <= ?", (digest, accessed_at)
+                ).rowcount
+                if deleted:
+                    self._remove(path)
+                    removed.append(size)
+
+        return {'files': len(removed), 'bytes': sum(removed)}
+
+    def _remove(self, path):
+        full_path = os.path.join(self.root, *path.split('/'))
+        try:
+            os.remove(full_path)
+        except FileNotFoundError:
+            pass
+        # Drop shard directories left empty; rmdir refuses non-empty ones
+        directory = os.path.dirname(full_path)
+        for _ in range(SHARD_DEPTH):
+            if os.path.abspath(directory) == os.path.abspath(self.root):
+                break
+            try:
+                os.rmdir(directory)
+            except OSError:
+                break
+            directory = os.path.dirname(directory)
+
+    def start_compaction(self, interval=COMPACTION_INTERVAL):
+        """Run compact() every `interval` seconds in a daemon thread"""
+        if self._compactor is not None:
+            return
+
+        def run():
+            while not self._stopping.wait(interval):
+                try:
+                    removed = self.compact()
+                except sqlite3.Error as e:
+                    print(f"Error compacting uploads: {e}")
+                    continue
+                if removed['files']:
+                    print(f"Removed {removed['files']} uploads ({removed['bytes']} bytes)")
+
+        self._compactor = threading.Thread(target=run, name='upload-compactor', daemon=True)
+        self._compactor.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._compactor is not None:
+            self._compactor.join()
@@ -0,0 +1,158 @@
+import math
+import numpy as np
+
+# Field -> (minimum, maximum, default) for one soil/weather sample
+SAMPLE_SCHEMA = {
+    'ph': (0.0, 14.0, 7.0),
+    'temperature': (-20.0, 60.0, 25.0),
+}
+
+# Georeferenced samples for field rasters
+GEO_SAMPLE_SCHEMA = {
+    'lat': (-90.0, 90.0, None),
+    'lon': (-180.0, 180.0, None),
+    **SAMPLE_SCHEMA,
+}
+
+# Strings longer than this are rejected as numbers without trying to parse them
+MAX_NUMBER_LENGTH = 32
+
+MAX_BATCH_ROWS = 200000
+
+
+class ValidationError(ValueError):
+    """Malformed request input; the message is safe to send back to the client"""
+
+    def __init__(self, message, field=None):
+        super().__init__(message)
+        self.field = field
+
+
+def parse_number(name, value, minimum, maximum):
+    """
+    Parse one form or JSON value as a finite float within [minimum, maximum]
+
+    Numbers and numeric strings (form fields are always strings) are accepted;
+    booleans are not, here or in parse_column.
+
+    Raises:
+        ValidationError: If the value isn't a number or is out of range
+    """
+    if isinstance(value, bool) or (isinstance(value, str) and len(value) > MAX_NUMBER_LENGTH):
+        raise ValidationError(f"{name} must be a number", name)
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValidationError(f"{name} must be a number", name)
+    if not math.isfinite(number):
+        raise ValidationError(f"{name} must be a finite number", name)
+    if not minimum <= number <= maximum:
+        raise ValidationError(f"{name} must be between {minimum:g} and {maximum:g}", name)
+    return number
+
+
+def parse_sample(source, schema=SAMPLE_SCHEMA, required=False):
+    """
+    Validate a single sample from a form or JSON object
+
+    Args:
+        source: request.form or a decoded JSON object
+        schema: Field -> (minimum, maximum, default)
+        required: Reject missing fields instead of using their defaults
+
+    Returns:
+        dict: Field -> float
+    """
+    if not hasattr(source, 'get'):
+        raise ValidationError("Expected an object")
+
+    sample = {}
+    for name, (minimum, maximum, default) in schema.items():
+        value = source.get(name)
+        if value is None or value == '':
+            if required:
+                raise ValidationError(f"{name} is required", name)
+            sample[name] = default
+        else:
+            sample[name] = parse_number(name, value, minimum, maximum)
+    return sample
+
+
+def check_range(name, values, minimum, maximum, allow_nan=False):
+    """
+    Reject arrays with values outside [minimum, maximum] (or NaN, unless allowed)
+
+    Raises:
+        ValidationError: Naming the first offending index
+    """
+    bad = ~((values >= minimum) & (values <= maximum))
+    if allow_nan:
+        bad &= ~np.isnan(values)
+    if bad.any():
+        index = np.unravel_index(int(np.argmax(bad)), values.shape)
+        position = ']['.join(str(int(i)) for i in index)
+        if np.isnan(values[index]):
+            # Missing values (None) in a row batch come through as NaN
+            raise ValidationError(f"{name}[{position}] must be a number", name)
+        raise ValidationError(f"{name}[{position}] must be between {minimum:g} and {maximum:g}", name)
+
+
+def parse_column(name, values, minimum, maximum):
+    """Convert a JSON list straight into a float64 array and range-check it"""
+    if not isinstance(values, list):
+        raise ValidationError(f"{name} must be a list of numbers", name)
+    # Same rules as parse_number; NumPy would quietly turn True into 1.0
+    for i, value in enumerate(values):
+        if isinstance(value, bool) or (isinstance(value, str) and len(value) > MAX_NUMBER_LENGTH):
+            raise ValidationError(f"{name}[{i}] must be a number", name)
+    try:
+        column = np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        raise ValidationError(f"{name} must contain only numbers", name)
+    if column.ndim != 1:
+        raise ValidationError(f"{name} must be a flat list of numbers", name)
+    check_range(name, column, minimum, maximum)
+    return column
+
+
+def parse_columns(payload, schema=SAMPLE_SCHEMA, max_rows=MAX_BATCH_ROWS):
+    """
+    Validate a batch into one NumPy array per field
+
+    Accepts columns ({"ph": [...], "temperature": [...]}) or rows
+    ({"samples": [{"ph": ..., "temperature": ...}, ...]}). Lengths are
+    checked before any conversion, so oversized batches are cheap to reject.
+
+    Returns:
+        dict: Field -> float64 array, all the same length
+    """
+    if not isinstance(payload, dict):
+        raise ValidationError("Expected a JSON object")
+
+    if 'samples' in payload:
+        samples = payload['samples']
+        if not isinstance(samples, list) or not all(isinstance(sample, dict) for sample in samples):
+            raise ValidationError("samples must be a list of objects", 'samples')
+        if len(samples) > max_rows:
+            raise ValidationError(f"At most {max_rows} samples per request", 'samples')
+        columns = {name: [sample.get(name) for sample in samples] for name in schema}
+    else:
+        missing = [name for name in schema if name not in payload]
+        if missing:
+            raise ValidationError(f"Missing columns: {', '.join(missing)}", missing[0])
+        columns = {name: payload[name] for name in schema}
+
+    for name, values in columns.items():
+        if not isinstance(values, list):
+            raise ValidationError(f"{name} must be a list of numbers", name)
+    lengths = {len(values) for values in columns.values()}
+    if len(lengths) > 1:
+        raise ValidationError(f"{' and '.join(schema)} must be lists of the same length")
+    length = lengths.pop()
+    if length == 0:
+        raise ValidationError("Batch is empty")
+    if length > max_rows:
+        raise ValidationError(f"At most {max_rows} samples per request")
+
+    return {name: parse_column(name, columns[name], minimum, maximum)
+            for name, (minimum, maximum, _) in schema.items()}